@@ -6,12 +6,31 @@ Provides real-time and historical F1 data including driver info, lap times, car
 import discord
 from redbot.core import commands
 from redbot.core.bot import Red
-import aiohttp
+from redbot.core.data_manager import cog_data_path
 import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import json
 from typing import Optional, List, Dict, Any
 import math
+from functools import partial
+from io import BytesIO
+
+from .archive import SessionArchive
+from .charts import (
+    CHART_CACHE_SIZE,
+    CHART_CACHE_TTL,
+    CHART_WORKERS,
+    render_lap_times,
+    render_positions,
+    render_speed_trace,
+    team_color,
+)
+from .client import OpenF1Client, OpenF1Error
+from .index import F1Index, INDEX_REFRESH_INTERVAL
+from .live import LiveSession, SessionReplay, session_is_live
 
 
 class F1(commands.Cog):
@@ -20,32 +39,118 @@ class F1(commands.Cog):
     def __init__(self, bot: Red):
         self.bot = bot
         self.base_url = "https://api.openf1.org/v1"
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.client = OpenF1Client(self.base_url)
+        # Session key -> live poller, shared by every channel following that session
+        self.live_sessions: Dict[int, LiveSession] = {}
+        # Channel id -> replay of an archived session running in that channel
+        self.replays: Dict[int, asyncio.Task] = {}
+        self.archive: Optional[SessionArchive] = None
+        self.index = F1Index()
+        self.index_task: Optional[asyncio.Task] = None
+        self.chart_executor = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="f1_charts")
+        # (session key, driver number, chart type) -> (rendered at, PNG bytes)
+        self.chart_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
         
     async def cog_load(self):
-        """Initialize the aiohttp session when the cog loads."""
-        self.session = aiohttp.ClientSession()
+        """Initialize the HTTP client and the session archive when the cog loads."""
+        await self.client.start()
+        self.archive = SessionArchive(cog_data_path(self) / "archive.sqlite3")
+        await self.archive.load()
+        self.index_task = asyncio.create_task(self.refresh_index_loop())
         
     async def cog_unload(self):
-        """Close the aiohttp session when the cog unloads."""
-        if self.session:
-            await self.session.close()
-            
-    async def fetch_data(self, endpoint: str, params: Dict[str, Any] = None) -> List[Dict]:
-        """Fetch data from the OpenF1 API."""
-        if not self.session:
-            return []
-            
-        url = f"{self.base_url}/{endpoint}"
-        try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    return []
-        except Exception as e:
-            print(f"Error fetching data from {endpoint}: {e}")
-            return []
+        """Close the HTTP client when the cog unloads."""
+        if self.index_task:
+            self.index_task.cancel()
+        for live_session in self.live_sessions.values():
+            live_session.stop()
+        self.live_sessions.clear()
+        for replay in self.replays.values():
+            replay.cancel()
+        self.replays.clear()
+        await self.client.close()
+        self.chart_executor.shutdown(wait=False)
+            
+    async def fetch_data(self, endpoint: str, params: Dict[str, Any] = None, background: bool = False) -> List[Dict]:
+        """Fetch data from the local archive if the session is archived, else from the OpenF1 API."""
+        if self.archive is not None:
+            data = await self.archive.query(endpoint, params)
+            if data is not None:
+                return data
+        return await self.client.get(endpoint, params, background=background)
+
+    async def refresh_index(self):
+        """Refresh the sessions of the season and the drivers of the most recent session."""
+        current_year = datetime.now().year
+        sessions = await self.fetch_data("sessions", {"year": current_year})
+        if sessions:
+            self.index.set_sessions(current_year, sessions)
+        last_session = self.index.last_started(datetime.now(timezone.utc))
+        session_key = last_session['session_key'] if last_session else "latest"
+        drivers = await self.fetch_data("drivers", {"session_key": session_key})
+        if drivers:
+            self.index.set_drivers(session_key, drivers, latest=True)
+
+    async def refresh_index_loop(self):
+        """Keep the in-memory index up to date in the background."""
+        while True:
+            try:
+                await self.refresh_index()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error refreshing the F1 index: {e}")
+            await asyncio.sleep(INDEX_REFRESH_INTERVAL)
+
+    async def get_driver(self, driver_number: int, session_key: Any = None) -> Optional[Dict]:
+        """Resolve a driver from the index, fetching the whole session's drivers only once on a miss."""
+        driver = self.index.driver(driver_number, session_key)
+        if driver is not None:
+            return driver
+        if session_key is None:
+            data = await self.fetch_data("drivers", {"driver_number": driver_number})
+            return data[0] if data else None
+        if self.index.has_drivers(session_key):
+            return None
+        data = await self.fetch_data("drivers", {"session_key": session_key})
+        self.index.set_drivers(session_key, data)
+        for driver in data:
+            if driver['driver_number'] == driver_number:
+                return driver
+        return None
+
+    def get_cached_chart(self, key: tuple) -> Optional[bytes]:
+        """Get a rendered chart. Charts of archived sessions never expire."""
+        cached = self.chart_cache.get(key)
+        if cached is None:
+            return None
+        rendered_at, image = cached
+        if self.archive.session_key_of({"session_key": key[0]}) is None and time.monotonic() - rendered_at > CHART_CACHE_TTL:
+            del self.chart_cache[key]
+            return None
+        self.chart_cache.move_to_end(key)
+        return image
+
+    async def render_chart(self, key: tuple, render, *args) -> bytes:
+        """Render a chart in the worker threads and cache it."""
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(self.chart_executor, partial(render, *args))
+        if str(key[0]).isdigit():  # "latest" is a moving target
+            self.chart_cache[key] = (time.monotonic(), image)
+            while len(self.chart_cache) > CHART_CACHE_SIZE:
+                self.chart_cache.popitem(last=False)
+        return image
+
+    async def send_chart(self, ctx, image: bytes, title: str, description: str):
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=discord.Color.red(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_image(url="attachment://chart.png")
+        embed.set_footer(text="Data from OpenF1 API")
+        await ctx.send(embed=embed, file=discord.File(BytesIO(image), filename="chart.png"))
 
     @commands.command(name="f1")
     async def f1_overview(self, ctx):
@@ -53,24 +158,19 @@ class F1(commands.Cog):
         async with ctx.typing():
             # Get current year sessions
             current_year = datetime.now().year
-            data = await self.fetch_data("sessions", {"year": current_year})
+            if not self.index.has_season(current_year):
+                await self.refresh_index()
             
-            if not data:
+            if not self.index.has_season(current_year):
                 await ctx.send("❌ No F1 sessions found for this year")
                 return
             
-            # Sort sessions by date
-            for session in data:
-                session['date_start'] = datetime.fromisoformat(session['date_start'].replace('Z', '+00:00'))
-            
-            data.sort(key=lambda x: x['date_start'])
-            
-            # Get upcoming and recent sessions
+            # Get upcoming and recent sessions from the index, sorted by date
             now = datetime.now().replace(tzinfo=None)
             # Make now timezone-aware to match session dates
             now = now.replace(tzinfo=timezone.utc)
-            upcoming_sessions = [s for s in data if s['date_start'] > now][:5]
-            recent_sessions = [s for s in data if s['date_start'] <= now][-3:]
+            upcoming_sessions = self.index.upcoming(now, 5)
+            recent_sessions = self.index.recent(now, 3)
             
             embed = discord.Embed(
                 title="🏎️ Formula 1 Overview",
@@ -139,13 +239,11 @@ class F1(commands.Cog):
     async def f1driver(self, ctx, driver_number: int):
         """Get information about a specific F1 driver by their number."""
         async with ctx.typing():
-            data = await self.fetch_data("drivers", {"driver_number": driver_number})
+            driver = await self.get_driver(driver_number)
             
-            if not data:
+            if not driver:
                 await ctx.send(f"❌ No driver found with number {driver_number}")
                 return
-                
-            driver = data[0]  # Get the first (and should be only) result
             
             embed = discord.Embed(
                 title=f"🏎️ {driver['full_name']}",
@@ -168,7 +266,11 @@ class F1(commands.Cog):
     async def f1drivers(self, ctx, session_key: str = "latest"):
         """Get all drivers for a specific session."""
         async with ctx.typing():
-            data = await self.fetch_data("drivers", {"session_key": session_key})
+            if self.index.has_drivers(session_key):
+                data = self.index.session_drivers(session_key)
+            else:
+                data = await self.fetch_data("drivers", {"session_key": session_key})
+                self.index.set_drivers(session_key, data)
             
             if not data:
                 await ctx.send("❌ No drivers found for this session")
@@ -257,9 +359,7 @@ class F1(commands.Cog):
             # Get driver info if driver_number is specified
             driver_info = None
             if driver_number:
-                driver_data = await self.fetch_data("drivers", {"driver_number": driver_number, "session_key": session_key})
-                if driver_data:
-                    driver_info = driver_data[0]
+                driver_info = await self.get_driver(driver_number, session_key)
             
             embed = discord.Embed(
                 title="⏱️ F1 Lap Data",
@@ -340,8 +440,7 @@ class F1(commands.Cog):
                 return
                 
             # Get driver info
-            driver_data = await self.fetch_data("drivers", {"driver_number": driver_number, "session_key": session_key})
-            driver_info = driver_data[0] if driver_data else None
+            driver_info = await self.get_driver(driver_number, session_key)
             
             embed = discord.Embed(
                 title="📊 F1 Car Telemetry",
@@ -557,7 +656,299 @@ class F1(commands.Cog):
             embed.set_footer(text="Data from OpenF1 API")
             await ctx.send(embed=embed)
 
+    @commands.command(name="f1live")
+    @commands.guild_only()
+    @commands.admin_or_permissions(manage_channels=True)
+    async def f1live(self, ctx, session_key: str = "latest"):
+        """Follow a session live in this channel with a leaderboard updated in place."""
+        async with ctx.typing():
+            data = await self.fetch_data("sessions", {"session_key": session_key})
+            
+            if not data:
+                await ctx.send("❌ No session found")
+                return
+                
+            session = data[0]
+            is_live, reason = session_is_live(session)
+            if not is_live:
+                await ctx.send(f"❌ {reason}")
+                return
+            
+            # A channel follows only one session at a time
+            for live_session in self.live_sessions.values():
+                if live_session.session_key != session['session_key']:
+                    live_session.unsubscribe(ctx.channel.id)
+            
+            live_session = self.live_sessions.get(session['session_key'])
+            if live_session is None:
+                live_session = self.live_sessions[session['session_key']] = LiveSession(self, session)
+            await live_session.subscribe(ctx.channel)
+
+    @commands.command(name="f1livestop")
+    @commands.guild_only()
+    @commands.admin_or_permissions(manage_channels=True)
+    async def f1livestop(self, ctx):
+        """Stop following a live session or a replay in this channel."""
+        replay = self.replays.pop(ctx.channel.id, None)
+        if replay is not None and not replay.done():
+            replay.cancel()
+            await ctx.send("✅ Stopped the replay in this channel")
+            return
+        for live_session in list(self.live_sessions.values()):
+            if live_session.unsubscribe(ctx.channel.id):
+                if not live_session.channels:
+                    live_session.stop()
+                await ctx.send(f"✅ Stopped following session `{live_session.session_key}` in this channel")
+                return
+        await ctx.send("❌ This channel is not following any live session")
 
+    @commands.command(name="f1archive")
+    @commands.is_owner()
+    async def f1archive(self, ctx, session_key: str = "latest"):
+        """Download a finished session once and serve it locally from now on."""
+        async with ctx.typing():
+            data = await self.fetch_data("sessions", {"session_key": session_key})
+            
+            if not data:
+                await ctx.send("❌ No session found")
+                return
+                
+            session = data[0]
+            if session.get('date_end') and datetime.fromisoformat(session['date_end'].replace('Z', '+00:00')) > datetime.now(timezone.utc):
+                await ctx.send("❌ This session is not over yet, its data can still change")
+                return
+            
+            counts = await self.archive.archive_session(session, self.fetch_data)
+            
+            embed = discord.Embed(
+                title="🗄️ Session Archived",
+                description=f"**{session['session_name']}** - {session.get('circuit_short_name', 'Unknown Circuit')}\n"
+                            f"🔑 `{session['session_key']}`",
+                color=discord.Color.green(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(
+                name="📦 Rows",
+                value="\n".join(f"**{endpoint}:** {count}" for endpoint, count in counts.items()),
+                inline=False
+            )
+            embed.set_footer(text=f"Archive size: {self.archive.size() / 1024 / 1024:.1f} MB")
+            await ctx.send(embed=embed)
+
+    @commands.command(name="f1archives")
+    async def f1archives(self, ctx):
+        """List the sessions available offline."""
+        if not self.archive.sessions:
+            await ctx.send("❌ No session has been archived yet")
+            return
+            
+        embed = discord.Embed(
+            title="🗄️ Archived Sessions",
+            color=discord.Color.dark_blue(),
+            timestamp=datetime.utcnow()
+        )
+        
+        sessions = sorted(self.archive.sessions.values(), key=lambda x: x['date_start'])
+        embed.description = "\n".join(
+            f"**{session['session_name']}** - {session.get('circuit_short_name', 'Unknown Circuit')} "
+            f"({session['date_start'][:10]}) | 🔑 `{session['session_key']}`"
+            for session in sessions[-25:]
+        )
+        embed.set_footer(text="Archived sessions are served locally and can be replayed with f1replay")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="f1unarchive")
+    @commands.is_owner()
+    async def f1unarchive(self, ctx, session_key: int):
+        """Delete a session from the local archive."""
+        if await self.archive.delete_session(session_key):
+            await ctx.send(f"✅ Session `{session_key}` removed from the archive")
+        else:
+            await ctx.send(f"❌ Session `{session_key}` is not archived")
+
+    @commands.command(name="f1replay")
+    @commands.guild_only()
+    @commands.admin_or_permissions(manage_channels=True)
+    async def f1replay(self, ctx, session_key: int, speed: int = 10):
+        """Replay an archived session in this channel at an accelerated speed."""
+        if session_key not in self.archive.sessions:
+            await ctx.send(f"❌ Session `{session_key}` is not archived. Use `f1archive {session_key}` first")
+            return
+        if not 1 <= speed <= 100:
+            await ctx.send("❌ Speed must be between 1 and 100")
+            return
+        if ctx.channel.id in self.replays and not self.replays[ctx.channel.id].done():
+            await ctx.send("❌ A replay is already running in this channel. Use `f1livestop` to stop it")
+            return
+            
+        drivers = await self.archive.get_rows(session_key, "drivers")
+        events = await self.archive.replay_events(session_key)
+        replay = SessionReplay(self.archive.sessions[session_key], drivers, events, speed)
+        self.replays[ctx.channel.id] = asyncio.create_task(self.run_replay(replay, ctx.channel))
+
+    async def run_replay(self, replay: SessionReplay, channel: discord.abc.Messageable):
+        """Run a replay, and forget it once finished."""
+        try:
+            await replay.run(channel)
+        finally:
+            if self.replays.get(channel.id) is asyncio.current_task():
+                del self.replays[channel.id]
+
+    @commands.command(name="f1apistats")
+    @commands.is_owner()
+    async def f1apistats(self, ctx):
+        """Show the OpenF1 request statistics: latency, status codes, retries and rate limiting."""
+        stats = self.client.stats
+        
+        embed = discord.Embed(
+            title="📡 OpenF1 API Statistics",
+            description=f"Since {stats.started_at.strftime('%Y-%m-%d %H:%M UTC')}",
+            color=discord.Color.blurple(),
+            timestamp=datetime.utcnow()
+        )
+        
+        embed.add_field(name="📨 Requests", value=str(stats.requests), inline=True)
+        embed.add_field(name="🔁 Retries", value=str(stats.retries), inline=True)
+        embed.add_field(name="❌ Failures", value=str(stats.failures), inline=True)
+        
+        if stats.latencies:
+            embed.add_field(
+                name="⏱️ Latency",
+                value=f"**Average:** {sum(stats.latencies) / len(stats.latencies) * 1000:.0f} ms\n"
+                      f"**p50:** {stats.percentile(50) * 1000:.0f} ms\n"
+                      f"**p95:** {stats.percentile(95) * 1000:.0f} ms\n"
+                      f"**Max:** {max(stats.latencies) * 1000:.0f} ms",
+                inline=True
+            )
+        if stats.status_codes:
+            embed.add_field(
+                name="🔢 Status Codes",
+                value="\n".join(f"**{status}:** {count}" for status, count in stats.status_codes.most_common()),
+                inline=True
+            )
+        if stats.endpoints:
+            embed.add_field(
+                name="🗂️ Endpoints",
+                value="\n".join(f"**{endpoint}:** {count}" for endpoint, count in stats.endpoints.most_common(10)),
+                inline=True
+            )
+        embed.add_field(name="🚦 Time Throttled", value=f"{stats.throttled:.1f}s", inline=True)
+        
+        embed.set_footer(text=f"Archived sessions are served locally: {len(self.archive.sessions)}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="f1speedchart")
+    @commands.bot_has_permissions(attach_files=True, embed_links=True)
+    async def f1speedchart(self, ctx, session_key: str, driver_number: int, lap_number: int = None):
+        """Render the speed trace of a lap for a driver (defaults to their best lap)."""
+        async with ctx.typing():
+            key = (session_key, driver_number, f"speed:{lap_number or 'best'}")
+            driver_info = await self.get_driver(driver_number, session_key)
+            driver_name = driver_info['full_name'] if driver_info else f'#{driver_number}'
+            image = self.get_cached_chart(key)
+            
+            if image is None:
+                laps = await self.fetch_data("laps", {"session_key": session_key, "driver_number": driver_number})
+                laps = [lap for lap in laps if lap.get('lap_duration') and lap.get('date_start')]
+                if lap_number is not None:
+                    laps = [lap for lap in laps if lap['lap_number'] == lap_number]
+                
+                if not laps:
+                    await ctx.send("❌ No timed lap found")
+                    return
+                    
+                lap = min(laps, key=lambda x: x['lap_duration'])
+                lap_start = datetime.fromisoformat(lap['date_start'].replace('Z', '+00:00'))
+                lap_end = lap_start + timedelta(seconds=lap['lap_duration'])
+                data = await self.fetch_data("car_data", {
+                    "session_key": session_key,
+                    "driver_number": driver_number,
+                    "date>=": lap_start.isoformat(),
+                    "date<": lap_end.isoformat()
+                })
+                
+                if not data:
+                    await ctx.send("❌ No telemetry data found for this lap")
+                    return
+                    
+                points = [
+                    ((datetime.fromisoformat(point['date'].replace('Z', '+00:00')) - lap_start).total_seconds(), point['speed'])
+                    for point in data
+                ]
+                image = await self.render_chart(
+                    key,
+                    render_speed_trace,
+                    points,
+                    f"{driver_name} - Lap {lap['lap_number']} ({lap['lap_duration']:.3f}s)",
+                    team_color(driver_info)
+                )
+                
+            await self.send_chart(ctx, image, "📈 F1 Speed Trace", f"Session: {session_key} | Driver: {driver_name}")
+
+    @commands.command(name="f1lapchart")
+    @commands.bot_has_permissions(attach_files=True, embed_links=True)
+    async def f1lapchart(self, ctx, session_key: str, driver_number: int):
+        """Render the lap time evolution of a driver in a session."""
+        async with ctx.typing():
+            key = (session_key, driver_number, "laps")
+            driver_info = await self.get_driver(driver_number, session_key)
+            driver_name = driver_info['full_name'] if driver_info else f'#{driver_number}'
+            image = self.get_cached_chart(key)
+            
+            if image is None:
+                data = await self.fetch_data("laps", {"session_key": session_key, "driver_number": driver_number})
+                laps = sorted(
+                    (lap['lap_number'], lap['lap_duration']) for lap in data if lap.get('lap_duration')
+                )
+                
+                if not laps:
+                    await ctx.send("❌ No lap data found")
+                    return
+                    
+                image = await self.render_chart(
+                    key,
+                    render_lap_times,
+                    laps,
+                    f"{driver_name} - Lap Times",
+                    team_color(driver_info)
+                )
+                
+            await self.send_chart(ctx, image, "⏱️ F1 Lap Time Evolution", f"Session: {session_key} | Driver: {driver_name}")
+
+    @commands.command(name="f1positionchart")
+    @commands.bot_has_permissions(attach_files=True, embed_links=True)
+    async def f1positionchart(self, ctx, session_key: str):
+        """Render the position changes of every driver during a session."""
+        async with ctx.typing():
+            key = (session_key, None, "positions")
+            image = self.get_cached_chart(key)
+            
+            if image is None:
+                data = await self.fetch_data("position", {"session_key": session_key})
+                
+                if not data:
+                    await ctx.send("❌ No position data found")
+                    return
+                    
+                # Looked up by number in the rows, the index only keeps numeric session keys ("latest" isn't)
+                if self.index.has_drivers(session_key):
+                    session_drivers = self.index.session_drivers(session_key)
+                else:
+                    session_drivers = await self.fetch_data("drivers", {"session_key": session_key})
+                    self.index.set_drivers(session_key, session_drivers)
+                drivers = {driver['driver_number']: driver for driver in session_drivers}
+                series = {}
+                for point in sorted(data, key=lambda x: x['date']):
+                    driver_info = drivers.get(point['driver_number'])
+                    name = driver_info['name_acronym'] if driver_info else f"#{point['driver_number']}"
+                    if name not in series:
+                        series[name] = ([], [], team_color(driver_info))
+                    series[name][0].append(datetime.fromisoformat(point['date'].replace('Z', '+00:00')))
+                    series[name][1].append(point['position'])
+                    
+                image = await self.render_chart(key, render_positions, series, "Positions")
+                
+            await self.send_chart(ctx, image, "🏁 F1 Position Chart", f"Session: {session_key}")
 
     @f1_overview.error
     @f1driver.error
@@ -569,9 +960,21 @@ class F1(commands.Cog):
     @f1weather.error
     @f1telemetry.error
     @f1radio.error
+    @f1live.error
+    @f1livestop.error
+    @f1archive.error
+    @f1archives.error
+    @f1unarchive.error
+    @f1replay.error
+    @f1apistats.error
+    @f1speedchart.error
+    @f1lapchart.error
+    @f1positionchart.error
     async def f1_error_handler(self, ctx, error):
         """Handle errors for F1 commands."""
-        if isinstance(error, commands.MissingRequiredArgument):
+        if isinstance(error, commands.CommandInvokeError) and isinstance(error.original, OpenF1Error):
+            await ctx.send("❌ The OpenF1 API is unavailable or rate limiting requests, please try again later")
+        elif isinstance(error, commands.MissingRequiredArgument):
             await ctx.send(f"❌ Missing required argument: {error.param}")
         elif isinstance(error, commands.BadArgument):
             await ctx.send("❌ Invalid argument provided. Please check your input.")
@@ -0,0 +1,328 @@
+"""
+Local session archive for the F1 cog.
+Finished sessions never change, so they can be downloaded once and served from a SQLite file.
+"""
+
+import asyncio
+import json
+import sqlite3
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Iterator, Tuple
+
+from .live import LIVE_ENDPOINTS
+
+# Endpoints downloaded for an archived session
+ARCHIVE_ENDPOINTS = (
+    "drivers",
+    "laps",
+    "stints",
+    "pit",
+    "weather",
+    "position",
+    "race_control",
+    "team_radio",
+    "car_data",
+)
+# Endpoints too large to be fetched at once, stored in one chunk per driver
+PER_DRIVER_ENDPOINTS = ("car_data",)
+ALL_DRIVERS = -1  # Driver number of chunks holding every driver
+CHUNK_CACHE_SIZE = 16  # Decoded chunks kept in memory
+
+OPERATORS = (">=", "<=", ">", "<")
+
+
+def encode_rows(rows: List[Dict]) -> bytes:
+    """Store rows column by column, which compresses far better than a list of objects."""
+    columns: Dict[str, List] = {}
+    for index, row in enumerate(rows):
+        for key, value in row.items():
+            if key not in columns:
+                columns[key] = [None] * index
+            columns[key].append(value)
+        for key, values in columns.items():
+            if len(values) <= index:
+                values.append(None)
+    payload = {"length": len(rows), "columns": columns}
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode(), 6)
+
+
+def decode_rows(blob: bytes) -> List[Dict]:
+    payload = json.loads(zlib.decompress(blob))
+    columns = payload["columns"]
+    return [
+        {key: values[index] for key, values in columns.items()}
+        for index in range(payload["length"])
+    ]
+
+
+def _matches(value: Any, operator: str, expected: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            expected = float(expected)
+        except (TypeError, ValueError):
+            return False
+    elif isinstance(value, bool):
+        expected = str(expected).lower() in ("1", "true")
+    else:
+        expected = str(expected)
+    if operator == ">=":
+        return value >= expected
+    if operator == "<=":
+        return value <= expected
+    if operator == ">":
+        return value > expected
+    if operator == "<":
+        return value < expected
+    return value == expected
+
+
+def filter_rows(rows: List[Dict], params: Dict[str, Any]) -> List[Dict]:
+    """Apply OpenF1 query parameters (`key=value`, `key>=value`, ...) locally."""
+    filters: List[Tuple[str, str, Any]] = []
+    for key, expected in params.items():
+        for operator in OPERATORS:
+            if key.endswith(operator):
+                filters.append((key[:-len(operator)], operator, expected))
+                break
+        else:
+            filters.append((key, "=", expected))
+    return [
+        row for row in rows
+        if all(_matches(row.get(key), operator, expected) for key, operator, expected in filters)
+    ]
+
+
+class SessionArchive:
+    """SQLite store of whole sessions, one compressed columnar chunk per endpoint (and driver)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sessions: Dict[int, Dict[str, Any]] = {}
+        # Meeting key -> keys of all its sessions, archived or not
+        self.meetings: Dict[int, List[int]] = {}
+        self._chunks: "OrderedDict[Tuple[int, str, int], List[Dict]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open the database in a transaction, creating the tables if needed."""
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions ("
+                    "session_key INTEGER PRIMARY KEY, meeting_key INTEGER, data TEXT NOT NULL, archived_at TEXT NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS chunks ("
+                    "session_key INTEGER NOT NULL, endpoint TEXT NOT NULL, driver_number INTEGER NOT NULL, rows BLOB NOT NULL, "
+                    "PRIMARY KEY (session_key, endpoint, driver_number))"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS meetings (meeting_key INTEGER PRIMARY KEY, session_keys TEXT NOT NULL)"
+                )
+                yield connection
+        finally:
+            connection.close()
+
+    def _load_sessions(self) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, List[int]]]:
+        with self._connect() as connection:
+            sessions = {
+                session_key: json.loads(data)
+                for session_key, data in connection.execute("SELECT session_key, data FROM sessions")
+            }
+            meetings = {
+                meeting_key: json.loads(session_keys)
+                for meeting_key, session_keys in connection.execute("SELECT meeting_key, session_keys FROM meetings")
+            }
+        return sessions, meetings
+
+    async def load(self):
+        """Load the list of archived sessions."""
+        self.sessions, self.meetings = await asyncio.to_thread(self._load_sessions)
+
+    def session_key_of(self, params: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Get the archived session a query is scoped to, if any."""
+        if not params or "session_key" not in params:
+            return None
+        try:
+            session_key = int(params["session_key"])
+        except (TypeError, ValueError):
+            return None  # "latest" is never archived
+        return session_key if session_key in self.sessions else None
+
+    def session_keys_of(self, params: Optional[Dict[str, Any]]) -> List[int]:
+        """Get the archived sessions a query is scoped to: its session, or all the sessions of its meeting."""
+        session_key = self.session_key_of(params)
+        if session_key is not None:
+            return [session_key]
+        if not params or "session_key" in params or "meeting_key" not in params:
+            return []
+        try:
+            meeting_key = int(params["meeting_key"])
+        except (TypeError, ValueError):
+            return []  # "latest" is never archived
+        session_keys = self.meetings.get(meeting_key)
+        # Until every session of the meeting is archived, the API has data the archive doesn't.
+        if not session_keys or any(session_key not in self.sessions for session_key in session_keys):
+            return []
+        return session_keys
+
+    def _read_chunks(self, session_key: int, endpoint: str, driver_number: Optional[int]) -> List[Tuple[int, bytes]]:
+        with self._connect() as connection:
+            if driver_number is None:
+                return connection.execute(
+                    "SELECT driver_number, rows FROM chunks WHERE session_key = ? AND endpoint = ?",
+                    (session_key, endpoint),
+                ).fetchall()
+            return connection.execute(
+                "SELECT driver_number, rows FROM chunks WHERE session_key = ? AND endpoint = ? AND driver_number = ?",
+                (session_key, endpoint, driver_number),
+            ).fetchall()
+
+    async def get_rows(self, session_key: int, endpoint: str, driver_number: Optional[int] = None) -> List[Dict]:
+        """Get the archived rows of an endpoint, only reading the chunk of one driver when possible."""
+        if endpoint not in PER_DRIVER_ENDPOINTS:
+            driver_number = ALL_DRIVERS
+        key = (session_key, endpoint, driver_number if driver_number is not None else ALL_DRIVERS)
+        if driver_number is not None and key in self._chunks:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+        chunks = await asyncio.to_thread(self._read_chunks, session_key, endpoint, driver_number)
+        rows = []
+        for chunk_driver_number, blob in chunks:
+            chunk_rows = await asyncio.to_thread(decode_rows, blob)
+            self._chunks[(session_key, endpoint, chunk_driver_number)] = chunk_rows
+            self._chunks.move_to_end((session_key, endpoint, chunk_driver_number))
+            rows.extend(chunk_rows)
+        while len(self._chunks) > CHUNK_CACHE_SIZE:
+            self._chunks.popitem(last=False)
+        if len(chunks) > 1:
+            rows.sort(key=lambda row: row.get('date') or '')
+        return rows
+
+    async def query(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[List[Dict]]:
+        """Answer an OpenF1 query from the archive, or return None if it isn't archived."""
+        if endpoint not in ARCHIVE_ENDPOINTS:
+            return None
+        session_keys = self.session_keys_of(params)
+        if not session_keys:
+            return None
+        driver_number = params.get("driver_number")
+        try:
+            driver_number = int(driver_number) if driver_number is not None else None
+        except (TypeError, ValueError):
+            driver_number = None
+        rows = []
+        for session_key in session_keys:
+            rows.extend(await self.get_rows(session_key, endpoint, driver_number))
+        if len(session_keys) > 1:
+            rows.sort(key=lambda row: row.get('date') or '')
+        return filter_rows(
+            rows,
+            {key: value for key, value in params.items() if key not in ("session_key", "meeting_key")},
+        )
+
+    def _write_session(
+        self,
+        session: Dict[str, Any],
+        chunks: Dict[Tuple[str, int], bytes],
+        meeting_session_keys: Optional[List[int]],
+    ):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM chunks WHERE session_key = ?", (session['session_key'],))
+            connection.executemany(
+                "INSERT INTO chunks (session_key, endpoint, driver_number, rows) VALUES (?, ?, ?, ?)",
+                [
+                    (session['session_key'], endpoint, driver_number, blob)
+                    for (endpoint, driver_number), blob in chunks.items()
+                ],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (session_key, meeting_key, data, archived_at) VALUES (?, ?, ?, ?)",
+                (
+                    session['session_key'],
+                    session.get('meeting_key'),
+                    json.dumps(session),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            if meeting_session_keys:
+                connection.execute(
+                    "INSERT OR REPLACE INTO meetings (meeting_key, session_keys) VALUES (?, ?)",
+                    (session['meeting_key'], json.dumps(meeting_session_keys)),
+                )
+
+    async def archive_session(
+        self,
+        session: Dict[str, Any],
+        fetch: Callable[[str, Dict[str, Any]], Awaitable[List[Dict]]],
+    ) -> Dict[str, int]:
+        """Download a whole session and store it. Returns the number of rows per endpoint."""
+        session_key = session['session_key']
+        chunks: Dict[Tuple[str, int], bytes] = {}
+        counts: Dict[str, int] = {}
+        async with self._lock:
+            drivers = await fetch("drivers", {"session_key": session_key})
+            for endpoint in ARCHIVE_ENDPOINTS:
+                if endpoint in PER_DRIVER_ENDPOINTS:
+                    counts[endpoint] = 0
+                    for driver in drivers:
+                        rows = await fetch(endpoint, {"session_key": session_key, "driver_number": driver['driver_number']})
+                        chunks[(endpoint, driver['driver_number'])] = await asyncio.to_thread(encode_rows, rows)
+                        counts[endpoint] += len(rows)
+                else:
+                    rows = drivers if endpoint == "drivers" else await fetch(endpoint, {"session_key": session_key})
+                    chunks[(endpoint, ALL_DRIVERS)] = await asyncio.to_thread(encode_rows, rows)
+                    counts[endpoint] = len(rows)
+            # The sessions of the meeting, to know when it is fully archived
+            meeting_session_keys = None
+            if session.get('meeting_key') is not None:
+                meeting_session_keys = sorted(
+                    meeting_session['session_key']
+                    for meeting_session in await fetch("sessions", {"meeting_key": session['meeting_key']})
+                )
+            await asyncio.to_thread(self._write_session, session, chunks, meeting_session_keys)
+            self.sessions[session_key] = session
+            if meeting_session_keys:
+                self.meetings[session['meeting_key']] = meeting_session_keys
+            self._forget_chunks(session_key)
+        return counts
+
+    def _delete_session(self, session_key: int):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM chunks WHERE session_key = ?", (session_key,))
+            connection.execute("DELETE FROM sessions WHERE session_key = ?", (session_key,))
+
+    async def delete_session(self, session_key: int) -> bool:
+        if session_key not in self.sessions:
+            return False
+        async with self._lock:
+            await asyncio.to_thread(self._delete_session, session_key)
+            del self.sessions[session_key]
+            self._forget_chunks(session_key)
+        return True
+
+    def _forget_chunks(self, session_key: int):
+        for key in [key for key in self._chunks if key[0] == session_key]:
+            del self._chunks[key]
+
+    def size(self) -> int:
+        """Size of the archive file in bytes."""
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    async def replay_events(self, session_key: int) -> List[Tuple[str, str, Dict]]:
+        """Get the archived live timing events of a session, sorted by date."""
+        events = []
+        for endpoint, field in LIVE_ENDPOINTS.items():
+            for row in await self.get_rows(session_key, endpoint):
+                if row.get(field):
+                    events.append((row[field], endpoint, row))
+        events.sort(key=lambda event: event[0])
+        return events
@@ -0,0 +1,79 @@
+"""
+Chart rendering for the F1 cog.
+Charts are drawn with the object-oriented matplotlib API, which is safe to use from worker threads.
+"""
+
+import io
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from matplotlib.axes import Axes
+from matplotlib.dates import DateFormatter
+from matplotlib.figure import Figure
+
+BACKGROUND = "#15151e"
+FOREGROUND = "#e6e6e6"
+DEFAULT_COLOR = "#e10600"
+
+CHART_WORKERS = 2  # Threads rendering charts off the event loop
+CHART_CACHE_SIZE = 64  # Rendered charts kept in memory
+CHART_CACHE_TTL = 15 * 60  # Seconds before a chart of a non archived session is rendered again
+
+
+def team_color(driver: Optional[Dict]) -> str:
+    if driver and driver.get('team_colour'):
+        return f"#{driver['team_colour'].lstrip('#')}"
+    return DEFAULT_COLOR
+
+
+def _new_figure(title: str) -> Tuple[Figure, Axes]:
+    figure = Figure(figsize=(10, 5), dpi=100, facecolor=BACKGROUND)
+    axes = figure.add_subplot()
+    axes.set_facecolor(BACKGROUND)
+    axes.set_title(title, color=FOREGROUND)
+    axes.tick_params(colors=FOREGROUND)
+    for spine in axes.spines.values():
+        spine.set_color(FOREGROUND)
+    axes.grid(True, color="#3a3a48", linewidth=0.5)
+    return figure, axes
+
+
+def _to_png(figure: Figure) -> bytes:
+    buffer = io.BytesIO()
+    figure.tight_layout()
+    figure.savefig(buffer, format="png", facecolor=figure.get_facecolor())
+    return buffer.getvalue()
+
+
+def render_speed_trace(points: List[Tuple[float, float]], title: str, color: str) -> bytes:
+    """Speed (km/h) against the time elapsed in the lap (s)."""
+    figure, axes = _new_figure(title)
+    axes.plot([point[0] for point in points], [point[1] for point in points], color=color, linewidth=1.5)
+    axes.set_xlabel("Time in lap (s)", color=FOREGROUND)
+    axes.set_ylabel("Speed (km/h)", color=FOREGROUND)
+    return _to_png(figure)
+
+
+def render_lap_times(laps: List[Tuple[int, float]], title: str, color: str) -> bytes:
+    """Lap duration (s) against the lap number."""
+    figure, axes = _new_figure(title)
+    axes.plot([lap[0] for lap in laps], [lap[1] for lap in laps], color=color, marker="o", markersize=3, linewidth=1.5)
+    axes.set_xlabel("Lap", color=FOREGROUND)
+    axes.set_ylabel("Lap time (s)", color=FOREGROUND)
+    return _to_png(figure)
+
+
+def render_positions(series: Dict[str, Tuple[List[datetime], List[int], str]], title: str) -> bytes:
+    """Position of every driver over the session, P1 on top."""
+    figure, axes = _new_figure(title)
+    for name, (dates, positions, color) in series.items():
+        axes.step(dates, positions, where="post", color=color, linewidth=1.5, label=name)
+    axes.invert_yaxis()
+    axes.set_yticks(range(1, max((max(positions) for _, positions, _ in series.values()), default=20) + 1))
+    axes.xaxis.set_major_formatter(DateFormatter("%H:%M"))
+    axes.set_xlabel("Time (UTC)", color=FOREGROUND)
+    axes.set_ylabel("Position", color=FOREGROUND)
+    legend = axes.legend(loc="center left", bbox_to_anchor=(1.0, 0.5), fontsize=8, frameon=False)
+    for text in legend.get_texts():
+        text.set_color(FOREGROUND)
+    return _to_png(figure)
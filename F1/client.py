@@ -0,0 +1,200 @@
+"""
+Rate-limit-aware OpenF1 HTTP client for the F1 cog.
+Requests go through token buckets matched to the OpenF1 limits and are retried with backoff.
+"""
+
+import aiohttp
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, List, Dict, Any
+
+# OpenF1 allows 3 requests per second and 30 requests per minute
+RATE_LIMITS = ((3, 1), (30, 60))  # (requests, per seconds)
+BACKGROUND_RESERVE = 0.5  # Share of each bucket background requests (live polling) leave to the others
+BACKGROUND_MIN_WAIT = 0.1  # Seconds, while other requests are waiting for tokens
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # Seconds, doubled on each retry
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 15  # OpenF1 cancels queries after 10 seconds on its side
+POOL_SIZE = 10  # Simultaneous connections to the API
+LATENCY_SAMPLES = 500  # Latencies kept to compute percentiles
+
+
+class OpenF1Error(Exception):
+    """Raised when the OpenF1 API can't answer a request, even after retrying."""
+
+
+class TokenBucket:
+    """Allow `capacity` requests at once, refilled at `capacity / period` tokens per second."""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self, reserve: float = 0.0) -> float:
+        """Seconds before a token can be taken while leaving `reserve` tokens in the bucket."""
+        return max(0.0, (1 + reserve - self.tokens) / self.rate)
+
+    def penalize(self):
+        """Empty the bucket after the API answered 429, it is more strict than we thought."""
+        self.tokens = 0.0
+        self.updated_at = time.monotonic()
+
+
+class RateLimiter:
+    """Take a token from every bucket at once, so no token is held while waiting for another bucket.
+
+    Background requests leave a reserve in the buckets and wait while other requests are queued,
+    so commands stay responsive while live sessions are polled.
+    """
+
+    def __init__(self, limits=RATE_LIMITS):
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in limits]
+        self.waiting = 0  # Requests other than background ones waiting for tokens
+
+    async def acquire(self, background: bool = False) -> float:
+        """Take a token from every bucket, waiting for them if needed. Returns the time waited."""
+        waited = 0.0
+        if not background:
+            self.waiting += 1
+        try:
+            while True:
+                now = time.monotonic()
+                for bucket in self.buckets:
+                    bucket.refill(now)
+                delay = max(
+                    bucket.delay(bucket.capacity * BACKGROUND_RESERVE if background else 0.0)
+                    for bucket in self.buckets
+                )
+                # Checked and taken without awaiting, so no other request can take the tokens meanwhile.
+                if delay == 0 and not (background and self.waiting):
+                    for bucket in self.buckets:
+                        bucket.tokens -= 1
+                    return waited
+                if background:
+                    delay = max(delay, BACKGROUND_MIN_WAIT)
+                waited += delay
+                await asyncio.sleep(delay)
+        finally:
+            if not background:
+                self.waiting -= 1
+
+    def penalize(self):
+        for bucket in self.buckets:
+            bucket.penalize()
+
+
+class RequestStats:
+    """Counters of the requests sent to the API."""
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled = 0.0  # Seconds spent waiting for the rate limiter
+        self.status_codes: Counter = Counter()
+        self.endpoints: Counter = Counter()
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, endpoint: str, status: Any, latency: float):
+        self.requests += 1
+        self.status_codes[status] += 1
+        self.endpoints[endpoint] += 1
+        self.latencies.append(latency)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))]
+
+
+class OpenF1Client:
+    """Shared aiohttp session with rate limiting, retries and statistics."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.limiter = RateLimiter()
+        self.stats = RequestStats()
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_SIZE, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+        """Read the `Retry-After` header, given in seconds or as an HTTP date."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    async def get(self, endpoint: str, params: Dict[str, Any] = None, background: bool = False) -> List[Dict]:
+        """Get the rows of an endpoint. Raises OpenF1Error if the API keeps failing.
+
+        Background requests (live polling) give way to the others when the rate limit is reached.
+        """
+        if not self.session:
+            raise OpenF1Error("The HTTP session is closed.")
+        url = f"{self.base_url}/{endpoint}"
+        error = None
+        for attempt in range(MAX_RETRIES + 1):
+            self.stats.throttled += await self.limiter.acquire(background)
+            start = time.monotonic()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    self.stats.record(endpoint, response.status, time.monotonic() - start)
+                    if response.status == 200:
+                        return await response.json()
+                    if response.status == 404:
+                        return []  # OpenF1 answers 404 when no row matches the query
+                    if response.status != 429 and response.status < 500:
+                        raise OpenF1Error(f"OpenF1 answered {response.status} for {endpoint}.")
+                    if response.status == 429:
+                        self.limiter.penalize()
+                    error = f"HTTP {response.status}"
+                    delay = self.retry_after(response)
+                    if delay is None:
+                        delay = self.backoff(attempt)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.stats.record(endpoint, type(e).__name__, time.monotonic() - start)
+                error = type(e).__name__
+                delay = self.backoff(attempt)
+            if attempt == MAX_RETRIES:
+                break
+            self.stats.retries += 1
+            await asyncio.sleep(min(delay, BACKOFF_MAX))
+        self.stats.failures += 1
+        raise OpenF1Error(f"OpenF1 is unavailable for {endpoint} ({error}).")
@@ -0,0 +1,95 @@
+"""
+In-memory lookup tables for the F1 cog.
+Sessions of the season are kept sorted by start time and drivers are indexed by number per session.
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+
+INDEX_REFRESH_INTERVAL = 30 * 60  # Seconds between two background refreshes
+INDEX_MAX_SESSIONS = 64  # Sessions whose drivers are kept in memory
+
+
+class F1Index:
+    """Sessions sorted by start time with bisect lookups, and driver number -> info per session."""
+
+    def __init__(self):
+        self.year: Optional[int] = None
+        self.sessions: List[Dict[str, Any]] = []
+        self.starts: List[datetime] = []
+        # Session key -> driver number -> driver
+        self.drivers: "OrderedDict[int, Dict[int, Dict]]" = OrderedDict()
+        # Driver number -> info from the most recent session
+        self.latest_drivers: Dict[int, Dict] = {}
+        self.refreshed_at: Optional[datetime] = None
+
+    def set_sessions(self, year: int, sessions: List[Dict]):
+        """Index the sessions of a season. Dates are parsed once here."""
+        indexed = []
+        for session in sessions:
+            session = dict(session)
+            session['date_start'] = datetime.fromisoformat(session['date_start'].replace('Z', '+00:00'))
+            indexed.append(session)
+        indexed.sort(key=lambda x: x['date_start'])
+        self.year = year
+        self.sessions = indexed
+        self.starts = [session['date_start'] for session in indexed]
+        self.refreshed_at = datetime.now(timezone.utc)
+
+    def has_season(self, year: int) -> bool:
+        return self.year == year and bool(self.sessions)
+
+    def upcoming(self, now: datetime, count: int) -> List[Dict]:
+        index = bisect_right(self.starts, now)
+        return self.sessions[index:index + count]
+
+    def recent(self, now: datetime, count: int) -> List[Dict]:
+        index = bisect_right(self.starts, now)
+        return self.sessions[max(0, index - count):index]
+
+    def last_started(self, now: datetime) -> Optional[Dict]:
+        recent = self.recent(now, 1)
+        return recent[0] if recent else None
+
+    @staticmethod
+    def session_key_of(session_key: Any) -> Optional[int]:
+        """Only numeric session keys can be cached, "latest" changes over time."""
+        try:
+            return int(session_key)
+        except (TypeError, ValueError):
+            return None
+
+    def set_drivers(self, session_key: Any, drivers: List[Dict], latest: bool = False):
+        if not drivers:
+            return  # Not published yet for an upcoming session, so fetched again next time
+        if latest:
+            self.latest_drivers = {driver['driver_number']: driver for driver in drivers}
+        session_key = self.session_key_of(session_key)
+        if session_key is None:
+            return
+        self.drivers[session_key] = {driver['driver_number']: driver for driver in drivers}
+        self.drivers.move_to_end(session_key)
+        while len(self.drivers) > INDEX_MAX_SESSIONS:
+            self.drivers.popitem(last=False)
+
+    def has_drivers(self, session_key: Any) -> bool:
+        return self.session_key_of(session_key) in self.drivers
+
+    def session_drivers(self, session_key: Any) -> List[Dict]:
+        session_key = self.session_key_of(session_key)
+        if session_key not in self.drivers:
+            return []
+        self.drivers.move_to_end(session_key)
+        return list(self.drivers[session_key].values())
+
+    def driver(self, driver_number: int, session_key: Any = None) -> Optional[Dict]:
+        """Get a driver in a session, or from the most recent session if no session is given."""
+        if session_key is None:
+            return self.latest_drivers.get(driver_number)
+        session_key = self.session_key_of(session_key)
+        if session_key not in self.drivers:
+            return None
+        self.drivers.move_to_end(session_key)
+        return self.drivers[session_key].get(driver_number)
@@ -0,0 +1,338 @@
+"""
+Live timing support for the F1 cog.
+A single poller per session incrementally fetches OpenF1 data and fans it out to every subscribed channel.
+"""
+
+import discord
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+
+from .client import OpenF1Error
+
+LIVE_POLL_INTERVAL = 10  # Seconds between two upstream polls of a session
+LIVE_MAX_BACKOFF = 5 * 60  # Seconds between two polls at most, while OpenF1 keeps failing
+LIVE_END_GRACE = timedelta(minutes=15)  # Keep polling a bit after the scheduled end for late data
+PENDING_LAP_WINDOW = timedelta(minutes=5)  # Laps still without a duration after this are ignored
+
+# Endpoint -> date field used as the incremental `date>` cursor
+LIVE_ENDPOINTS = {
+    "laps": "date_start",
+    "position": "date",
+    "race_control": "date",
+    "team_radio": "date",
+}
+
+
+def parse_date(value: str) -> datetime:
+    """Parse an OpenF1 ISO date."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class LiveTiming:
+    """State of a session rebuilt from incremental OpenF1 updates."""
+
+    def __init__(self, session: Dict[str, Any], drivers: List[Dict]):
+        self.session = session
+        self.drivers: Dict[int, Dict] = {driver['driver_number']: driver for driver in drivers}
+        self.positions: Dict[int, int] = {}
+        self.last_laps: Dict[int, Dict] = {}
+        self.best_laps: Dict[int, float] = {}
+        self.race_control: deque = deque(maxlen=5)
+        self.team_radio: deque = deque(maxlen=3)
+        self.cursors: Dict[str, datetime] = {}
+        self.finished = False
+
+    def cursor(self, endpoint: str) -> Dict[str, str]:
+        """Get the query parameters only returning rows newer than what was already applied."""
+        field = LIVE_ENDPOINTS[endpoint]
+        if endpoint == "laps":
+            # A lap row is published when the lap starts and its duration is filled in later,
+            # so keep re-fetching from the oldest lap which is still running.
+            newest = self.cursors.get(endpoint)
+            pending = [
+                parse_date(lap['date_start'])
+                for lap in self.last_laps.values()
+                if lap.get('date_start') and lap.get('lap_duration') is None
+            ]
+            if newest is not None:
+                pending = [date for date in pending if newest - date <= PENDING_LAP_WINDOW]
+            if pending:
+                return {f"{field}>=": min(pending).isoformat()}
+        if endpoint not in self.cursors:
+            return {}
+        return {f"{field}>": self.cursors[endpoint].isoformat()}
+
+    def apply(self, endpoint: str, rows: List[Dict]) -> bool:
+        """Apply new rows of an endpoint. Returns whether the leaderboard changed."""
+        field = LIVE_ENDPOINTS[endpoint]
+        changed = False
+        for row in sorted((row for row in rows if row.get(field)), key=lambda row: row[field]):
+            date = parse_date(row[field])
+            if endpoint not in self.cursors or date > self.cursors[endpoint]:
+                self.cursors[endpoint] = date
+            driver_number = row.get('driver_number')
+            if endpoint == "position":
+                if self.positions.get(driver_number) != row['position']:
+                    self.positions[driver_number] = row['position']
+                    changed = True
+            elif endpoint == "laps":
+                if row.get('lap_duration') and (
+                    driver_number not in self.best_laps
+                    or row['lap_duration'] < self.best_laps[driver_number]
+                ):
+                    self.best_laps[driver_number] = row['lap_duration']
+                    changed = True
+                last_lap = self.last_laps.get(driver_number)
+                if last_lap is not None and last_lap['lap_number'] > row['lap_number']:
+                    continue
+                if last_lap != row:
+                    self.last_laps[driver_number] = row
+                    changed = True
+            elif endpoint == "race_control":
+                self.race_control.append(row)
+                changed = True
+            elif endpoint == "team_radio":
+                self.team_radio.append(row)
+                changed = True
+        return changed
+
+    def driver_name(self, driver_number: int) -> str:
+        driver = self.drivers.get(driver_number)
+        return driver['name_acronym'] if driver else f"#{driver_number}"
+
+    def build_embed(self, title: str = "🔴 F1 Live Timing") -> discord.Embed:
+        """Build the leaderboard embed for the current state."""
+        session_name = self.session.get('session_name', 'Session')
+        circuit = self.session.get('circuit_short_name', 'Unknown Circuit')
+
+        order = sorted(self.positions.items(), key=lambda item: item[1])
+        if not order:
+            order = [(driver_number, None) for driver_number in sorted(self.drivers)]
+        leaderboard = []
+        for driver_number, position in order[:20]:
+            lap = self.last_laps.get(driver_number)
+            line = f"`P{position if position is not None else '-':<2}` **{self.driver_name(driver_number)}**"
+            if lap:
+                line += f" | Lap {lap['lap_number']}"
+                if lap.get('lap_duration'):
+                    line += f" | Last: {lap['lap_duration']:.3f}s"
+            if driver_number in self.best_laps:
+                line += f" | Best: {self.best_laps[driver_number]:.3f}s"
+            leaderboard.append(line)
+        # The leaderboard goes in the description, a field is too short for 20 drivers.
+        embed = discord.Embed(
+            title=f"{title} - {session_name}",
+            description=f"📍 {circuit} | 🔑 `{self.session['session_key']}`\n\n"
+                        + ("\n".join(leaderboard) if leaderboard else "Waiting for data..."),
+            color=discord.Color.dark_grey() if self.finished else discord.Color.red(),
+            timestamp=datetime.utcnow()
+        )
+
+        if self.race_control:
+            embed.add_field(
+                name="🚩 Race Control",
+                value="\n".join(
+                    f"`{parse_date(message['date']).strftime('%H:%M:%S')}` {message['message']}"
+                    for message in self.race_control
+                )[:1024],
+                inline=False
+            )
+        if self.team_radio:
+            embed.add_field(
+                name="📻 Team Radio",
+                value="\n".join(
+                    f"`{parse_date(message['date']).strftime('%H:%M:%S')}` "
+                    f"**{self.driver_name(message['driver_number'])}** [Listen]({message['recording_url']})"
+                    for message in self.team_radio
+                )[:1024],
+                inline=False
+            )
+
+        embed.set_footer(text="Session finished • Data from OpenF1 API" if self.finished else "Updated live • Data from OpenF1 API")
+        return embed
+
+
+class LiveSession:
+    """Background poller of one session, shared by all the channels subscribed to it."""
+
+    def __init__(self, cog, session: Dict[str, Any]):
+        self.cog = cog
+        self.session = session
+        self.session_key: int = session['session_key']
+        self.timing: Optional[LiveTiming] = None
+        # Channel id -> live leaderboard message in that channel
+        self.channels: Dict[int, Optional[discord.Message]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, channel: discord.abc.Messageable) -> discord.Message:
+        """Subscribe a channel and send its leaderboard message, which will be edited afterwards."""
+        if self.timing is not None:
+            embed = self.timing.build_embed()
+        else:
+            embed = discord.Embed(
+                title="🔴 F1 Live Timing",
+                description=f"Connecting to session `{self.session_key}`...",
+                color=discord.Color.red()
+            )
+        message = await channel.send(embed=embed)
+        self.channels[channel.id] = message
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return message
+
+    def unsubscribe(self, channel_id: int) -> bool:
+        """Unsubscribe a channel. Returns whether the channel was subscribed."""
+        return self.channels.pop(channel_id, None) is not None
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def is_over(self) -> bool:
+        date_end = self.session.get('date_end')
+        if not date_end:
+            return False
+        return datetime.now(timezone.utc) > parse_date(date_end) + LIVE_END_GRACE
+
+    async def poll(self) -> bool:
+        """Fetch every endpoint once from its cursor. Returns whether something changed."""
+        changed = False
+        for endpoint in LIVE_ENDPOINTS:
+            params = {"session_key": self.session_key, **self.timing.cursor(endpoint)}
+            rows = await self.cog.fetch_data(endpoint, params, background=True)
+            changed = self.timing.apply(endpoint, rows) or changed
+        return changed
+
+    async def run(self):
+        try:
+            first = True
+            failures = 0
+            while self.channels:
+                try:
+                    if self.timing is None:
+                        drivers = await self.cog.fetch_data("drivers", {"session_key": self.session_key})
+                        self.timing = LiveTiming(self.session, drivers)
+                    changed = await self.poll()
+                    failures = 0
+                except OpenF1Error as e:
+                    # Transient, keep the cursors and try again later.
+                    failures += 1
+                    print(f"Error polling live timing for session {self.session_key}: {e}")
+                    changed = False
+                if self.is_over():
+                    if self.timing is None:
+                        await self.broadcast_error("OpenF1 couldn't be reached before the end of the session.")
+                    else:
+                        self.timing.finished = True
+                        await self.broadcast()
+                    break
+                if self.timing is not None and (changed or first):
+                    await self.broadcast()
+                    first = False
+                await asyncio.sleep(min(LIVE_MAX_BACKOFF, LIVE_POLL_INTERVAL * 2 ** min(failures, 5)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in live timing for session {self.session_key}: {e}")
+            await self.broadcast_error(f"Live timing stopped after an unexpected error: {e}")
+        finally:
+            if self.cog.live_sessions.get(self.session_key) is self:
+                del self.cog.live_sessions[self.session_key]
+
+    async def broadcast_error(self, error: str):
+        """Tell every subscribed channel that the live timing stopped."""
+        await self.broadcast(
+            discord.Embed(
+                title="⚠️ F1 Live Timing Stopped",
+                description=f"Session `{self.session_key}`: {error}\nUse `f1live` to follow it again.",
+                color=discord.Color.dark_grey(),
+                timestamp=datetime.utcnow()
+            )
+        )
+
+    async def broadcast(self, embed: Optional[discord.Embed] = None):
+        """Edit the leaderboard message of every subscribed channel."""
+        if embed is None:
+            embed = self.timing.build_embed()
+        for channel_id, message in list(self.channels.items()):
+            channel = self.cog.bot.get_channel(channel_id)
+            if channel is None:
+                self.channels.pop(channel_id, None)
+                continue
+            try:
+                await message.edit(embed=embed)
+            except discord.NotFound:
+                # The leaderboard was deleted, so send a new one.
+                try:
+                    self.channels[channel_id] = await channel.send(embed=embed)
+                except discord.HTTPException:
+                    self.channels.pop(channel_id, None)
+            except discord.HTTPException:
+                pass
+
+
+def session_is_live(session: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """Check whether a session can be followed live, with the reason if not."""
+    now = datetime.now(timezone.utc)
+    if session.get('date_start') and parse_date(session['date_start']) - now > timedelta(hours=1):
+        return False, "This session has not started yet."
+    if session.get('date_end') and now > parse_date(session['date_end']) + LIVE_END_GRACE:
+        return False, "This session is already over."
+    return True, None
+
+
+REPLAY_TICK = 5  # Seconds between two edits of a replay leaderboard
+
+
+class SessionReplay:
+    """Replay of an archived session at accelerated speed in one channel."""
+
+    def __init__(self, session: Dict[str, Any], drivers: List[Dict], events: List[Tuple[str, str, Dict]], speed: int):
+        self.timing = LiveTiming(session, drivers)
+        self.events = events
+        self.speed = speed
+
+    def title(self) -> str:
+        return f"⏪ F1 Replay ({self.speed}x)"
+
+    def advance(self, index: int, clock: datetime) -> Tuple[int, bool]:
+        """Apply every event up to the replay clock. Returns the next event index and whether something changed."""
+        batches: Dict[str, List[Dict]] = {}
+        while index < len(self.events) and parse_date(self.events[index][0]) <= clock:
+            _, endpoint, row = self.events[index]
+            batches.setdefault(endpoint, []).append(row)
+            index += 1
+        changed = False
+        for endpoint, rows in batches.items():
+            changed = self.timing.apply(endpoint, rows) or changed
+        return index, changed
+
+    async def run(self, channel: discord.abc.Messageable):
+        message = await channel.send(embed=self.timing.build_embed(title=self.title()))
+        if not self.events:
+            self.timing.finished = True
+            await message.edit(embed=self.timing.build_embed(title=self.title()))
+            return
+        # Everything before the start of the session (grid positions...) is applied at once.
+        clock = parse_date(self.events[0][0])
+        if self.timing.session.get('date_start'):
+            clock = max(clock, parse_date(self.timing.session['date_start']))
+        index, _ = self.advance(0, clock)
+        while index < len(self.events):
+            await asyncio.sleep(REPLAY_TICK)
+            clock += timedelta(seconds=REPLAY_TICK * self.speed)
+            index, changed = self.advance(index, clock)
+            if changed:
+                try:
+                    await message.edit(embed=self.timing.build_embed(title=self.title()))
+                except discord.NotFound:
+                    return
+                except discord.HTTPException:
+                    pass
+        self.timing.finished = True
+        try:
+            await message.edit(embed=self.timing.build_embed(title=self.title()))
+        except discord.HTTPException:
+            pass
@@ -0,0 +1,356 @@
+from redbot.core.i18n import Translator  # isort:skip
+import typing  # isort:skip
+
+import asyncio
+import math
+import sqlite3
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from pathlib import Path
+
+from matplotlib.dates import DateFormatter
+from matplotlib.figure import Figure
+
+_: Translator = Translator("MinecraftAAA3A", __file__)
+
+HOUR: int = 60 * 60  # Samples are rolled up per hour in the database...
+HISTORY_RETENTION: int = 366 * 24 * HOUR  # ... and kept for a year.
+MAX_SAMPLE_GAP: int = 60 * 60  # Longer gaps (bot offline) aren't counted as uptime or downtime.
+PURGE_INTERVAL: int = 24 * HOUR
+RAW_HISTORY_PERIOD: int = 24 * HOUR  # The last samples are kept in memory, for the charts of a day.
+
+
+class RingBuffer:
+    """Fixed-size buffer of the last samples of a server, stored in compact arrays."""
+
+    def __init__(self, size: int) -> None:
+        self.size: int = size
+        self.timestamps: array = array("d", bytes(8 * size))
+        self.latencies: array = array("f", bytes(4 * size))  # NaN when offline.
+        self.players: array = array("H", bytes(2 * size))
+        self.length: int = 0
+        self.index: int = 0  # Where the next sample is written.
+
+    def append(self, timestamp: float, latency: float, players: int) -> None:
+        self.timestamps[self.index] = timestamp
+        self.latencies[self.index] = latency
+        self.players[self.index] = min(players, 0xFFFF)
+        self.index = (self.index + 1) % self.size
+        self.length = min(self.length + 1, self.size)
+
+    def last_timestamp(self) -> typing.Optional[float]:
+        return self.timestamps[self.index - 1] if self.length else None
+
+    def last_online(self) -> bool:
+        return self.length > 0 and not math.isnan(self.latencies[self.index - 1])
+
+    def samples(
+        self, since: float = 0
+    ) -> typing.Iterator[typing.Tuple[float, typing.Optional[float], int]]:
+        """Yield `(timestamp, latency, players)` from the oldest sample, `latency` is `None` when offline."""
+        start = (self.index - self.length) % self.size
+        for i in range(self.length):
+            i = (start + i) % self.size
+            if self.timestamps[i] >= since:
+                latency = self.latencies[i]
+                yield self.timestamps[i], None if math.isnan(latency) else latency, self.players[i]
+
+
+class HourlyRollup:
+    """Aggregate of the samples of a server during an hour. Durations are in seconds."""
+
+    __slots__ = (
+        "hour",
+        "seconds",
+        "online_seconds",
+        "latency_sum",
+        "latency_count",
+        "latency_max",
+        "players_sum",
+        "players_max",
+    )
+
+    def __init__(self, hour: int) -> None:
+        self.hour: int = hour
+        self.seconds: float = 0
+        self.online_seconds: float = 0
+        self.latency_sum: float = 0
+        self.latency_count: int = 0
+        self.latency_max: float = 0
+        self.players_sum: int = 0
+        self.players_max: int = 0
+
+    def add(
+        self, duration: float, was_online: bool, latency: typing.Optional[float], players: int
+    ) -> None:
+        """`duration` is the time since the previous sample, spent in the state of that sample."""
+        self.seconds += duration
+        if was_online:
+            self.online_seconds += duration
+        if latency is None:
+            return
+        self.latency_sum += latency
+        self.latency_count += 1
+        self.latency_max = max(self.latency_max, latency)
+        self.players_sum += players
+        self.players_max = max(self.players_max, players)
+
+
+class ServerHistory:
+    """Latency, online state and player count of the followed servers over time.
+
+    The last samples of each server are kept in memory. They are also rolled up per hour, and
+    the rollups are written to SQLite in batches, once per check cycle at most.
+    """
+
+    def __init__(self, path: Path, min_check_interval: float = 60) -> None:
+        self.path: Path = path
+        # Enough samples for a day, even for the servers checked the most often.
+        self.raw_history_size: int = math.ceil(RAW_HISTORY_PERIOD / min_check_interval)
+        self.buffers: typing.Dict[str, RingBuffer] = {}
+        self.rollups: typing.Dict[str, HourlyRollup] = {}  # Current hour of each server.
+        self.pending: typing.List[typing.Tuple[str, HourlyRollup]] = []  # Finished hours to write.
+        self.purged_at: float = 0
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    @contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _create_tables(self) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hourly ("
+                "server_url TEXT NOT NULL, hour INTEGER NOT NULL, seconds REAL NOT NULL, "
+                "online_seconds REAL NOT NULL, latency_sum REAL NOT NULL, latency_count INTEGER NOT NULL, "
+                "latency_max REAL NOT NULL, players_sum INTEGER NOT NULL, players_max INTEGER NOT NULL, "
+                "PRIMARY KEY (server_url, hour)) WITHOUT ROWID"
+            )
+
+    async def load(self) -> None:
+        await asyncio.to_thread(self._create_tables)
+
+    def record(
+        self,
+        server_url: str,
+        online: bool,
+        latency: typing.Optional[float] = None,
+        players: int = 0,
+    ) -> None:
+        """Record the result of a check. A failed check counts as offline."""
+        now = time.time()
+        latency = latency if online and latency is not None else None
+        if (buffer := self.buffers.get(server_url)) is None:
+            buffer = self.buffers[server_url] = RingBuffer(self.raw_history_size)
+        # The time since the previous sample is credited to the state of the previous sample: the
+        # server is only known to have changed at this check.
+        last_timestamp, was_online = buffer.last_timestamp(), buffer.last_online()
+        duration = (
+            now - last_timestamp
+            if last_timestamp is not None and now - last_timestamp <= MAX_SAMPLE_GAP
+            else 0
+        )
+        buffer.append(now, latency if latency is not None else math.nan, players if online else 0)
+        hour = int(now // HOUR * HOUR)
+        if (rollup := self.rollups.get(server_url)) is None or rollup.hour != hour:
+            if rollup is not None:
+                self.pending.append((server_url, rollup))
+            rollup = self.rollups[server_url] = HourlyRollup(hour)
+        rollup.add(duration, was_online, latency, players)
+
+    def forget(self, server_url: str) -> None:
+        """Stop keeping the server in memory. Its rollups stay in the database."""
+        self.buffers.pop(server_url, None)
+        if (rollup := self.rollups.pop(server_url, None)) is not None:
+            self.pending.append((server_url, rollup))
+
+    def _write_rollups(
+        self, rollups: typing.List[typing.Tuple[str, HourlyRollup]], purge_before: typing.Optional[int]
+    ) -> None:
+        with self._connect() as connection:
+            # Additive, so an hour written in two parts (cog reloaded) is merged.
+            connection.executemany(
+                "INSERT INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (server_url, hour) DO UPDATE SET "
+                "seconds = seconds + excluded.seconds, online_seconds = online_seconds + excluded.online_seconds, "
+                "latency_sum = latency_sum + excluded.latency_sum, latency_count = latency_count + excluded.latency_count, "
+                "latency_max = MAX(latency_max, excluded.latency_max), players_sum = players_sum + excluded.players_sum, "
+                "players_max = MAX(players_max, excluded.players_max)",
+                [
+                    (
+                        server_url,
+                        rollup.hour,
+                        rollup.seconds,
+                        rollup.online_seconds,
+                        rollup.latency_sum,
+                        rollup.latency_count,
+                        rollup.latency_max,
+                        rollup.players_sum,
+                        rollup.players_max,
+                    )
+                    for server_url, rollup in rollups
+                ],
+            )
+            if purge_before is not None:
+                connection.execute("DELETE FROM hourly WHERE hour < ?", (purge_before,))
+
+    async def flush(self, all_rollups: bool = False) -> None:
+        """Write the finished hours to the database, and the current ones too if `all_rollups`."""
+        if all_rollups:
+            self.pending.extend(self.rollups.items())
+            self.rollups.clear()
+        now = time.time()
+        purge_before = None
+        if now - self.purged_at >= PURGE_INTERVAL:
+            self.purged_at, purge_before = now, int(now - HISTORY_RETENTION)
+        if not self.pending and purge_before is None:
+            return
+        rollups, self.pending = self.pending, []
+        async with self._lock:
+            await asyncio.to_thread(self._write_rollups, rollups, purge_before)
+
+    def _read_rollups(self, server_url: str, since: int) -> typing.List[HourlyRollup]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT * FROM hourly WHERE server_url = ? AND hour >= ? ORDER BY hour",
+                (server_url, since),
+            ).fetchall()
+        rollups = []
+        for row in rows:
+            rollup = HourlyRollup(row[1])
+            (
+                rollup.seconds,
+                rollup.online_seconds,
+                rollup.latency_sum,
+                rollup.latency_count,
+                rollup.latency_max,
+                rollup.players_sum,
+                rollup.players_max,
+            ) = row[2:]
+            rollups.append(rollup)
+        return rollups
+
+    async def get_rollups(self, server_url: str, since: float) -> typing.List[HourlyRollup]:
+        """Get the hourly rollups of a server since a timestamp, including the unwritten ones."""
+        since = int(since // HOUR * HOUR)
+        async with self._lock:
+            rollups = {
+                rollup.hour: rollup
+                for rollup in await asyncio.to_thread(self._read_rollups, server_url, since)
+            }
+        in_memory = [rollup for _server_url, rollup in self.pending if _server_url == server_url]
+        if (current := self.rollups.get(server_url)) is not None:
+            in_memory.append(current)
+        for rollup in in_memory:
+            if rollup.hour < since:
+                continue
+            if (stored := rollups.get(rollup.hour)) is None:
+                stored = rollups[rollup.hour] = HourlyRollup(rollup.hour)
+            stored.seconds += rollup.seconds
+            stored.online_seconds += rollup.online_seconds
+            stored.latency_sum += rollup.latency_sum
+            stored.latency_count += rollup.latency_count
+            stored.latency_max = max(stored.latency_max, rollup.latency_max)
+            stored.players_sum += rollup.players_sum
+            stored.players_max = max(stored.players_max, rollup.players_max)
+        return sorted(rollups.values(), key=lambda rollup: rollup.hour)
+
+    async def get_uptimes(
+        self, server_url: str, periods: typing.Iterable[int]
+    ) -> typing.Dict[int, typing.Optional[float]]:
+        """Get the uptime ratio of a server over each period (in seconds), `None` without data."""
+        periods = sorted(periods)
+        now = time.time()
+        rollups = await self.get_rollups(server_url, since=now - periods[-1])
+        uptimes = {}
+        for period in periods:
+            seconds = online_seconds = 0
+            for rollup in rollups:
+                if rollup.hour + HOUR > now - period:
+                    seconds += rollup.seconds
+                    online_seconds += rollup.online_seconds
+            uptimes[period] = online_seconds / seconds if seconds else None
+        return uptimes
+
+    async def get_chart_series(self, server_url: str, since: float) -> typing.Optional[
+        typing.Tuple[
+            typing.List[datetime],
+            typing.List[typing.Optional[float]],
+            typing.List[typing.Optional[float]],
+            typing.List[float],
+        ]
+    ]:
+        """Build the series of a chart: raw samples for a day or less, hourly rollups beyond."""
+        dates, players, latencies, uptimes = [], [], [], []
+        if (
+            time.time() - since <= RAW_HISTORY_PERIOD
+            and (buffer := self.buffers.get(server_url)) is not None
+        ):
+            for timestamp, latency, _players in buffer.samples(since=since):
+                dates.append(datetime.fromtimestamp(timestamp, tz=timezone.utc))
+                players.append(_players if latency is not None else None)
+                latencies.append(latency)
+                uptimes.append(100 if latency is not None else 0)
+        else:
+            for rollup in await self.get_rollups(server_url, since=since):
+                dates.append(datetime.fromtimestamp(rollup.hour, tz=timezone.utc))
+                players.append(
+                    rollup.players_sum / rollup.latency_count if rollup.latency_count else None
+                )
+                latencies.append(
+                    rollup.latency_sum / rollup.latency_count if rollup.latency_count else None
+                )
+                uptimes.append(
+                    100 * rollup.online_seconds / rollup.seconds
+                    if rollup.seconds
+                    else (100 if rollup.latency_count else 0)
+                )
+        if len(dates) < 2:
+            return None
+        return dates, players, latencies, uptimes
+
+
+def render_history_chart(
+    title: str,
+    dates: typing.List[datetime],
+    players: typing.List[typing.Optional[float]],
+    latencies: typing.List[typing.Optional[float]],
+    uptimes: typing.List[float],
+) -> bytes:
+    """Players, latency (ms) and uptime (%) over time. `None` values leave a gap in the lines."""
+    figure = Figure(figsize=(10, 6), dpi=100)
+    axes = figure.subplots(3, 1, sharex=True, gridspec_kw={"height_ratios": [3, 2, 1]})
+    axes[0].set_title(title)
+    nan = float("nan")
+    axes[0].plot(
+        dates, [value if value is not None else nan for value in players], color="#2e8b57"
+    )
+    axes[0].set_ylabel(_("Players"))
+    axes[0].set_ylim(bottom=0)
+    axes[1].plot(
+        dates, [value if value is not None else nan for value in latencies], color="#4169e1"
+    )
+    axes[1].set_ylabel(_("Latency (ms)"))
+    axes[1].set_ylim(bottom=0)
+    axes[2].fill_between(dates, uptimes, step="post", color="#2e8b57", alpha=0.6)
+    axes[2].fill_between(dates, uptimes, 100, step="post", color="#dc143c", alpha=0.6)
+    axes[2].set_ylabel(_("Uptime (%)"))
+    axes[2].set_ylim(0, 100)
+    axes[2].xaxis.set_major_formatter(
+        DateFormatter("%H:%M" if dates[-1] - dates[0] <= timedelta(days=2) else "%d/%m")
+    )
+    for ax in axes:
+        ax.grid(True, linewidth=0.5, alpha=0.5)
+    buffer = BytesIO()
+    figure.tight_layout()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
@@ -1,5 +1,6 @@
 from AAA3A_utils import Cog, Loop, Menu  # isort:skip
 from redbot.core import commands, Config  # isort:skip
+from redbot.core.data_manager import cog_data_path  # isort:skip
 from redbot.core.bot import Red  # isort:skip
 from redbot.core.i18n import Translator, cog_i18n  # isort:skip
 import discord  # isort:skip
@@ -8,20 +9,55 @@ import typing_extensions  # isort:skip
 
 import asyncio
 import base64
+import heapq
+import ipaddress
+import json
+import logging
+import random
 import re
+import time
+from collections import OrderedDict, deque
 from io import BytesIO
+from urllib.parse import urlparse
 from uuid import UUID
 
 import aiohttp
+import dns.asyncresolver
+import dns.resolver
 from mcstatus import JavaServer
 from redbot.core.utils.chat_formatting import box, pagify
 
+from .history import ServerHistory, render_history_chart
+
 # Credits:
 # General repo credits.
 # Thanks to Fixator for the code to get informations about Minecraft servers (https://github.com/fixator10/Fixator10-Cogs/blob/V3/minecraftdata/minecraftdata.py)!
 
 _: Translator = Translator("MinecraftAAA3A", __file__)
 
+PROBE_CONCURRENCY: int = 50  # Status probes running at the same time.
+PROBE_TIMEOUT: int = 10  # Seconds before a probe (lookup + status) is abandoned.
+DNS_TTL_FLOOR: int = 60  # Resolved servers are kept at least this long, even with a lower TTL...
+DNS_TTL_CEILING: int = 60 * 60  # ... and at most this long.
+DNS_NEGATIVE_TTL: int = 5 * 60  # Servers without SRV record use the default port.
+DNS_ERROR_TTL: int = 30  # Failed lookups are remembered briefly, to not hammer a broken domain.
+DNS_CACHE_SIZE: int = 1024
+SCHEDULER_TICK: int = 10  # Seconds between two looks at the servers due for a check.
+CHECK_INTERVAL: int = 60  # Seconds between two checks of a stable online server...
+ACTIVE_CHECK_INTERVAL: int = 30  # ... of a server with players or flapping...
+MAX_CHECK_INTERVAL: int = 30 * 60  # ... and at most, for a server offline or erroring for long.
+FLAPPING_WINDOW: int = 10 * 60  # Two online/offline changes in this window make a server flapping.
+MOTD_CACHE_SIZE: int = 1024  # Cleaned MOTDs kept in memory.
+ICON_CACHE_SIZE: int = 256  # Decoded server icons kept in memory.
+PROFILE_CACHE_TTL: int = 60 * 60  # Seconds a player name -> UUID resolution is kept...
+PROFILE_NOT_FOUND_TTL: int = 5 * 60  # ... or that a name is unknown.
+PROFILE_CACHE_SIZE: int = 4096
+SKIN_CACHE_TTL: int = 60 * 60  # Seconds before a skin is downloaded again, in case it changed.
+SKIN_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # Skin renders kept in memory, least recently used evicted first.
+METRICS_CYCLES: int = 360  # Check cycles kept for the metrics, an hour at one cycle per tick.
+METRICS_PROBES: int = 20  # Probe durations kept per server.
+SLOW_CYCLE: int = 30  # Seconds above which a check cycle is logged as a warning.
+
 
 class MCPlayer:
     def __init__(self, name: str, uuid: str) -> None:
@@ -35,18 +71,24 @@ class MCPlayer:
     @classmethod
     async def convert(cls, ctx: commands.Context, argument: str) -> typing_extensions.Self:
         cog = ctx.bot.get_cog("MinecraftAAA3A")
-        try:
-            async with cog._session.get(
-                f"https://api.mojang.com/users/profiles/minecraft/{argument}",
-                raise_for_status=True,
-            ) as r:
-                response_data = await r.json()
-        except aiohttp.ContentTypeError:
-            response_data = None
-        except aiohttp.ClientResponseError as e:
-            raise commands.BadArgument(
-                _("Unable to get data from Minecraft API: {e.message}.").format(e=e)
-            )
+        if (cached := cog.profile_cache.get(argument.lower())) is not None and cached[
+            0
+        ] > time.monotonic():
+            response_data = cached[1]
+        else:
+            try:
+                async with cog._session.get(
+                    f"https://api.mojang.com/users/profiles/minecraft/{argument}",
+                    raise_for_status=True,
+                ) as r:
+                    response_data = await r.json()
+            except aiohttp.ContentTypeError:
+                response_data = None
+            except aiohttp.ClientResponseError as e:
+                raise commands.BadArgument(
+                    _("Unable to get data from Minecraft API: {e.message}.").format(e=e)
+                )
+            cog.cache_profile(argument, response_data)
         if response_data is None or "id" not in response_data:
             raise commands.BadArgument(
                 _("{argument} not found on Mojang servers.").format(argument=argument)
@@ -61,6 +103,168 @@ class MCPlayer:
             )
 
 
+class ServerResolver:
+    """Cache `JavaServer` objects resolved from SRV records, honoring the records TTL.
+
+    A records are still resolved by the system when connecting: the handshake needs the hostname.
+    """
+
+    def __init__(self) -> None:
+        # Least recently used first.
+        self.cache: typing.OrderedDict[
+            str, typing.Tuple[float, typing.Union[JavaServer, Exception]]
+        ] = OrderedDict()
+
+    async def lookup(self, address: str) -> JavaServer:
+        address = address.lower()
+        now = time.monotonic()
+        if (cached := self.cache.get(address)) is not None and cached[0] > now:
+            self.cache.move_to_end(address)
+            if isinstance(cached[1], Exception):
+                raise cached[1]
+            return cached[1]
+        try:
+            server, ttl = await self.resolve(address)
+        except Exception as e:
+            self.store(address, (now + DNS_ERROR_TTL, e))
+            raise
+        self.store(address, (now + min(max(ttl, DNS_TTL_FLOOR), DNS_TTL_CEILING), server))
+        return server
+
+    def store(
+        self, address: str, cached: typing.Tuple[float, typing.Union[JavaServer, Exception]]
+    ) -> None:
+        self.cache[address] = cached
+        self.cache.move_to_end(address)
+        if len(self.cache) > DNS_CACHE_SIZE:
+            now = time.monotonic()
+            for _address in [
+                _address for _address, _cached in self.cache.items() if _cached[0] <= now
+            ]:
+                del self.cache[_address]
+            # Any address typed by users is resolved, so the cache is bounded even if all are fresh.
+            while len(self.cache) > DNS_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    async def resolve(self, address: str) -> typing.Tuple[JavaServer, int]:
+        parsed = urlparse(f"//{address}")
+        host, port = parsed.hostname, parsed.port
+        if not host:
+            raise ValueError(f"Invalid server address: {address}.")
+        if port is not None:
+            return JavaServer(host, port), DNS_TTL_CEILING
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return JavaServer(host, JavaServer.DEFAULT_PORT), DNS_TTL_CEILING
+        try:
+            answers = await dns.asyncresolver.resolve(f"_minecraft._tcp.{host}", "SRV", lifetime=3)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return JavaServer(host, JavaServer.DEFAULT_PORT), DNS_NEGATIVE_TTL
+        record = answers[0]
+        return (
+            JavaServer(str(record.target).rstrip("."), int(record.port)),
+            answers.rrset.ttl,
+        )
+
+    def forget(self, address: str) -> None:
+        self.cache.pop(address.lower(), None)
+
+
+class StatusFingerprint(typing.NamedTuple):
+    """What matters in a status for notifications, cheap to compare."""
+
+    online: bool
+    players_online: int
+    players_max: int
+    player_ids: typing.Tuple[str, ...]
+    version: str
+    protocol: int
+    motd_hash: int
+    icon_hash: int
+
+    def for_channel(self, check_players: bool) -> typing_extensions.Self:
+        return self if check_players else self._replace(player_ids=())
+
+
+class ServerSchedule:
+    """When to check a server next, depending on how it behaved during the last checks."""
+
+    def __init__(self, server_url: str) -> None:
+        self.server_url: str = server_url
+        self.next_check: float = time.monotonic()
+        self.interval: float = CHECK_INTERVAL
+        self.failures: int = 0
+        self.online: typing.Optional[bool] = None
+        self.changes: typing.Deque[float] = deque(maxlen=5)
+
+    @property
+    def flapping(self) -> bool:
+        now = time.monotonic()
+        return sum(now - change < FLAPPING_WINDOW for change in self.changes) >= 2
+
+    def reschedule(self, online: typing.Optional[bool], players: int = 0) -> float:
+        """Compute the next check. `online` is `None` when the probe failed."""
+        now = time.monotonic()
+        if online is not None:
+            if self.online is not None and online != self.online:
+                self.changes.append(now)
+            self.online = online
+        if not online:
+            # Exponential backoff: 1, 2, 4... minutes, unless the server keeps going up and down.
+            self.failures += 1
+            self.interval = (
+                ACTIVE_CHECK_INTERVAL
+                if self.flapping
+                else min(MAX_CHECK_INTERVAL, CHECK_INTERVAL * 2 ** (self.failures - 1))
+            )
+        else:
+            self.failures = 0
+            self.interval = (
+                ACTIVE_CHECK_INTERVAL if players > 0 or self.flapping else CHECK_INTERVAL
+            )
+        # The jitter spreads the checks, so the load is smooth instead of bursting.
+        self.next_check = now + self.interval * random.uniform(0.9, 1.1)
+        return self.next_check
+
+
+class CycleMetrics:
+    """Measures of a check cycle. Durations are in seconds."""
+
+    def __init__(self) -> None:
+        self.started_at: float = time.time()
+        self.duration: float = 0
+        self.servers: int = 0
+        self.probe_durations: typing.List[float] = []
+        self.probe_wait: float = 0  # Time the probes waited for the semaphore, summed.
+        self.timeouts: int = 0
+        self.errors: int = 0
+        self.notifications: int = 0
+        self.discord_time: float = 0
+
+    def to_dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        return {
+            "servers": self.servers,
+            "duration": round(self.duration, 3),
+            "probe_p50": round(percentile(self.probe_durations, 50) or 0, 3),
+            "probe_p95": round(percentile(self.probe_durations, 95) or 0, 3),
+            "probe_wait": round(self.probe_wait, 3),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "notifications": self.notifications,
+            "discord_time": round(self.discord_time, 3),
+        }
+
+
+def percentile(values: typing.Iterable[float], percent: float) -> typing.Optional[float]:
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
 @cog_i18n(_)
 class MinecraftAAA3A(Cog):
     """A cog to display informations about Minecraft Java users and servers, and notify for each change of a server!"""
@@ -70,6 +274,26 @@ class MinecraftAAA3A(Cog):
 
         self._session: aiohttp.ClientSession = None
         self.cache: typing.Dict[int, typing.Dict[str, dict]] = {}
+        # Server URL -> IDs of the channels following it, so each server is probed once per cycle.
+        self.registry: typing.Dict[str, typing.Set[int]] = {}
+        self.probe_semaphore: asyncio.Semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+        self.resolver: ServerResolver = ServerResolver()
+        self.motd_cache: typing.Dict[str, str] = {}
+        self.icon_cache: typing.Dict[int, bytes] = {}
+        self.profile_cache: typing.Dict[str, typing.Tuple[float, typing.Optional[dict]]] = {}
+        # (UUID, overlay) -> (expiration, (head, skin, body)), in least recently used order.
+        self.skin_cache: typing.OrderedDict[
+            typing.Tuple[str, bool], typing.Tuple[float, typing.Tuple[bytes, bytes, bytes]]
+        ] = OrderedDict()
+        self.skin_cache_size: int = 0
+        self.schedules: typing.Dict[str, ServerSchedule] = {}
+        self.schedule_queue: typing.List[typing.Tuple[float, str]] = []  # Heap of next checks.
+        self.server_history: ServerHistory = None
+        # Mirror of the channels settings, kept up to date by the commands, so the check loop doesn't read Config.
+        self.channels_settings: typing.Dict[int, dict] = {}
+        self.dirty_channels: typing.Set[int] = set()  # Channels with message IDs to write to Config.
+        self.cycles_metrics: typing.Deque[CycleMetrics] = deque(maxlen=METRICS_CYCLES)
+        self.probe_durations: typing.Dict[str, typing.Deque[float]] = {}
 
         self.config: Config = Config.get_conf(
             self,
@@ -85,80 +309,294 @@ class MinecraftAAA3A(Cog):
     async def cog_load(self) -> None:
         await super().cog_load()
         self._session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.server_history: ServerHistory = ServerHistory(
+            cog_data_path(cog=self) / "history.sqlite3",
+            min_check_interval=ACTIVE_CHECK_INTERVAL,
+        )
+        await self.server_history.load()
+        for channel_id, channel_data in (await self.config.all_channels()).items():
+            if isinstance(channel_data["servers"], typing.List):
+                channel_data["servers"] = {server: None for server in channel_data["servers"]}
+            self.channels_settings[channel_id] = channel_data
+            for server_url in channel_data["servers"]:
+                self.register_server(channel_id, server_url)
         self.loops.append(
             Loop(
                 cog=self,
                 name="Check Minecraft Servers",
                 function=self.check_servers,
-                minutes=1,
+                seconds=SCHEDULER_TICK,
             )
         )
 
     async def cog_unload(self) -> None:
         await self._session.close()
+        await self.save_channels_settings()
+        if self.server_history is not None:
+            await self.server_history.flush(all_rollups=True)
         await super().cog_unload()
 
-    async def check_servers(self) -> None:
-        all_channels = await self.config.all_channels()
-        for channel_id in all_channels:
-            channel = self.bot.get_channel(channel_id)
-            if channel is None:
-                continue
-            if channel.id not in self.cache:
-                self.cache[channel.id] = {}
-            servers = all_channels[channel_id]["servers"]
-            check_players = all_channels[channel_id]["check_players"]
-            for server_url in servers:
-                try:
-                    server: JavaServer = await JavaServer.async_lookup(address=server_url.lower())
-                    status = await server.async_status()
-                except (asyncio.CancelledError, TimeoutError):
+    async def probe_server(
+        self, server_url: str, metrics: typing.Optional[CycleMetrics] = None
+    ) -> typing.Tuple[JavaServer, typing.Any]:
+        queued_at = start = time.monotonic()
+        acquired = False
+        try:
+            async with self.probe_semaphore:
+                start, acquired = time.monotonic(), True
+                return await asyncio.wait_for(
+                    self._probe_server(server_url=server_url), timeout=PROBE_TIMEOUT
+                )
+        finally:
+            # Failed and timed out probes too, as they are the slow servers to find.
+            if acquired:
+                duration = min(time.monotonic() - start, PROBE_TIMEOUT)
+                if metrics is not None:
+                    metrics.probe_wait += start - queued_at
+                    metrics.probe_durations.append(duration)
+                if server_url in self.schedules:  # Not unregistered meanwhile.
+                    if (probe_durations := self.probe_durations.get(server_url)) is None:
+                        probe_durations = self.probe_durations[server_url] = deque(
+                            maxlen=METRICS_PROBES
+                        )
+                    probe_durations.append(duration)
+
+    async def _probe_server(self, server_url: str) -> typing.Tuple[JavaServer, typing.Any]:
+        server: JavaServer = await self.resolver.lookup(server_url)
+        status = await server.async_status()
+        return server, status
+
+    def register_server(self, channel_id: int, server_url: str) -> None:
+        self.registry.setdefault(server_url, set()).add(channel_id)
+        if server_url not in self.schedules:
+            schedule = self.schedules[server_url] = ServerSchedule(server_url)
+            heapq.heappush(self.schedule_queue, (schedule.next_check, server_url))
+
+    def unregister_server(self, channel_id: int, server_url: str) -> None:
+        if (channel_ids := self.registry.get(server_url)) is not None:
+            channel_ids.discard(channel_id)
+            if not channel_ids:  # No channel follows this server anymore.
+                del self.registry[server_url]
+                del self.schedules[server_url]  # Its entry in the queue will be skipped.
+                self.probe_durations.pop(server_url, None)
+                self.resolver.forget(server_url)
+                self.server_history.forget(server_url)
+        self.cache.get(channel_id, {}).pop(server_url, None)
+
+    def get_channel_settings(self, channel_id: int) -> dict:
+        if (channel_settings := self.channels_settings.get(channel_id)) is None:
+            channel_settings = self.channels_settings[channel_id] = {
+                "servers": {},
+                "check_players": False,
+                "edit_last_message": False,
+            }
+        return channel_settings
+
+    async def save_channels_settings(self) -> None:
+        """Write the message IDs changed during the cycle, once per channel."""
+        dirty_channels, self.dirty_channels = self.dirty_channels, set()
+        for channel_id in dirty_channels:
+            if (channel_settings := self.channels_settings.get(channel_id)) is not None:
+                await self.config.channel_from_id(channel_id).servers.set(
+                    channel_settings["servers"]
+                )
+
+    def pop_due_servers(self) -> typing.List[str]:
+        now, due = time.monotonic(), []
+        while self.schedule_queue and self.schedule_queue[0][0] <= now:
+            next_check, server_url = heapq.heappop(self.schedule_queue)
+            if (
+                schedule := self.schedules.get(server_url)
+            ) is None or schedule.next_check != next_check:
+                continue  # Removed or rescheduled since.
+            due.append(server_url)
+        return due
+
+    def reschedule_server(
+        self, server_url: str, online: typing.Optional[bool], players: int = 0
+    ) -> None:
+        if (schedule := self.schedules.get(server_url)) is None:
+            return
+        heapq.heappush(
+            self.schedule_queue, (schedule.reschedule(online, players=players), server_url)
+        )
+
+    async def check_servers(self, force: bool = False) -> None:
+        """Check the servers due for a check, or all of them if `force`."""
+        due = list(self.registry) if force else self.pop_due_servers()
+        if not due:
+            return
+        metrics, start = CycleMetrics(), time.monotonic()
+        registry = {
+            server_url: self.registry[server_url].copy()
+            for server_url in due
+            if server_url in self.registry
+        }
+        metrics.servers = len(registry)
+        # All the probes run concurrently, so a cycle lasts as long as the slowest probe.
+        results = await asyncio.gather(
+            *(self.probe_server(server_url, metrics=metrics) for server_url in registry),
+            return_exceptions=True,
+        )
+        # Every server is recorded and rescheduled before any Discord request, so a failing
+        # channel can't drop a server from the queue.
+        probed, rescheduled = [], set()
+        try:
+            for (server_url, channel_ids), result in zip(registry.items(), results):
+                if isinstance(result, (asyncio.CancelledError, asyncio.TimeoutError)):
+                    metrics.timeouts += 1
+                    self.server_history.record(server_url, online=False)
+                    self.reschedule_server(server_url, online=None)
+                    rescheduled.add(server_url)
                     continue
-                except Exception as e:
+                elif isinstance(result, Exception):
                     self.logger.error(
-                        f"No data found for {server_url} server in {channel.id} channel in {channel.guild.id} guild.",
-                        exc_info=e,
+                        f"No data found for {server_url} server (followed in {len(channel_ids)} channel(s)).",
+                        exc_info=result,
                     )
+                    metrics.errors += 1
+                    self.server_history.record(server_url, online=False)
+                    self.reschedule_server(server_url, online=None)
+                    rescheduled.add(server_url)
                     continue
-                if check_players and "sample" in status.raw["players"]:
-                    players = {player["id"]: player for player in status.raw["players"]["sample"]}
-                    players = [players[_id] for _id in set(list(players.keys()))]
-                else:
-                    players = {}
-                status.raw["players"]["sample"] = players
-                if server_url not in self.cache[channel.id]:
-                    self.cache[channel.id][server_url] = {"server": server, "status": status}
+                server, status = result
+                # Computed once per probe, then compared for each channel.
+                fingerprint = self.get_fingerprint(status)
+                self.server_history.record(
+                    server_url,
+                    online=fingerprint.online,
+                    latency=status.latency,
+                    players=fingerprint.players_online,
+                )
+                self.reschedule_server(
+                    server_url, online=fingerprint.online, players=fingerprint.players_online
+                )
+                rescheduled.add(server_url)
+                probed.append((server_url, channel_ids, server, status, fingerprint))
+        finally:
+            for server_url in registry.keys() - rescheduled:
+                self.reschedule_server(server_url, online=None)
+        for server_url, channel_ids, server, status, fingerprint in probed:
+            # The result of the single probe is fanned out to every channel following the server.
+            embed, icon = None, None
+            for channel_id in channel_ids:
+                if (
+                    channel := self.bot.get_channel(channel_id)
+                ) is None or channel_id not in self.channels_settings:
                     continue
-                if status.raw != self.cache[channel.id][server_url]["status"].raw:
-                    if "This server is offline." in (
-                        await self.clear_mcformatting(status.description)
-                    ) and "This server is offline." in (
-                        await self.clear_mcformatting(
-                            self.cache[channel.id][server_url]["status"].description
-                        )
-                    ):  # Minecraft ADS
+                if channel.id not in self.cache:
+                    self.cache[channel.id] = {}
+                channel_fingerprint = fingerprint.for_channel(
+                    self.channels_settings[channel.id]["check_players"]
+                )
+                if (cached := self.cache[channel.id].get(server_url)) is not None:
+                    if channel_fingerprint == cached["fingerprint"]:
                         continue
-                    embed, icon = await self.get_embed(server, status)
-                    servers = await self.config.channel(channel).servers()
-                    if isinstance(servers, typing.List):
-                        servers = {server: None for server in servers}
-                    if (
-                        await self.config.channel(channel).edit_last_message()
-                        and servers[server_url] is not None
-                    ):
+                    if not channel_fingerprint.online and not cached["fingerprint"].online:
+                        continue  # Minecraft ADS
+                    if embed is None:  # Built once, then reused by all the channels.
                         try:
-                            message = await channel.get_partial_message(servers[server_url]).edit(
-                                embed=embed, attachments=[icon]
+                            embed, icon = await self.get_embed(server, status)
+                        except Exception as e:
+                            self.logger.error(
+                                f"Error when building the embed of {server_url} server.", exc_info=e
                             )
-                        except discord.HTTPException:
-                            message = await channel.send(embed=embed, file=icon)
-                    else:
-                        message = await channel.send(embed=embed, file=icon)
-                    servers[server_url] = message.id
-                    await self.config.channel(channel).servers.set(servers)
-                    self.cache[channel.id][server_url] = {"server": server, "status": status}
-
-    async def get_embed(self, server: JavaServer, status) -> discord.Embed:
+                            break
+                    discord_start = time.monotonic()
+                    await self.send_notification(
+                        channel,
+                        server_url,
+                        embed,
+                        icon,
+                        icon_changed=not cached["notified"]
+                        or cached["fingerprint"].icon_hash != fingerprint.icon_hash,
+                    )
+                    metrics.discord_time += time.monotonic() - discord_start
+                    metrics.notifications += 1
+                self.cache[channel.id][server_url] = {
+                    "server": server,
+                    "status": status,
+                    "fingerprint": channel_fingerprint,
+                    "notified": cached is not None,  # The last message has the current icon.
+                }
+        await self.save_channels_settings()
+        await self.server_history.flush()
+        metrics.duration = time.monotonic() - start
+        self.cycles_metrics.append(metrics)
+        self.logger.log(
+            logging.WARNING if metrics.duration > SLOW_CYCLE else logging.DEBUG,
+            "Check cycle: "
+            + " ".join(f"{key}={value}" for key, value in metrics.to_dict().items()),
+        )
+
+    async def send_notification(
+        self,
+        channel: discord.TextChannel,
+        server_url: str,
+        embed: discord.Embed,
+        icon: typing.Optional[bytes],
+        icon_changed: bool = True,
+    ) -> None:
+        channel_settings = self.get_channel_settings(channel.id)
+        servers = channel_settings["servers"]
+        message = None
+        if channel_settings["edit_last_message"] and servers.get(server_url) is not None:
+            try:
+                if icon_changed:
+                    message = await channel.get_partial_message(servers[server_url]).edit(
+                        embed=embed, attachments=[self.get_icon_file(icon)] if icon else []
+                    )
+                else:  # The icon already attached to the message is kept, without uploading it again.
+                    message = await channel.get_partial_message(servers[server_url]).edit(
+                        embed=embed
+                    )
+            except discord.HTTPException:
+                pass  # Deleted, so a new message is sent.
+        if message is None:
+            try:
+                message = await channel.send(embed=embed, file=self.get_icon_file(icon))
+            except discord.HTTPException as e:
+                # Missing permissions in one channel mustn't stop the cycle for the others.
+                self.logger.error(
+                    f"Error when notifying {server_url} server in the channel {channel.id}.",
+                    exc_info=e,
+                )
+                return
+        if server_url in servers:  # Not removed meanwhile.
+            servers[server_url] = message.id
+            self.dirty_channels.add(channel.id)
+
+    def get_fingerprint(self, status) -> StatusFingerprint:
+        server_description = self._clear_mcformatting(status.description)
+        return StatusFingerprint(
+            online="This server is offline." not in server_description,
+            players_online=status.players.online,
+            players_max=status.players.max,
+            player_ids=tuple(sorted({player.id for player in status.players.sample or []})),
+            version=status.version.name,
+            protocol=status.version.protocol,
+            motd_hash=hash(server_description),
+            icon_hash=hash(status.icon),
+        )
+
+    def get_icon(self, status) -> typing.Optional[bytes]:
+        """Decode the icon of a server, once per different icon."""
+        if not status.icon:
+            return None
+        if (icon := self.icon_cache.get(icon_hash := hash(status.icon))) is None:
+            if len(self.icon_cache) >= ICON_CACHE_SIZE:
+                del self.icon_cache[next(iter(self.icon_cache))]
+            icon = self.icon_cache[icon_hash] = base64.b64decode(
+                status.icon.removeprefix("data:image/png;base64,")
+            )
+        return icon
+
+    def get_icon_file(self, icon: typing.Optional[bytes]) -> typing.Optional[discord.File]:
+        return discord.File(BytesIO(icon), filename="icon.png") if icon is not None else None
+
+    async def get_embed(
+        self, server: JavaServer, status
+    ) -> typing.Tuple[discord.Embed, typing.Optional[bytes]]:
         server_description = await self.clear_mcformatting(status.description)
         embed: discord.Embed = discord.Embed(
             title=f"{server.address.host}:{server.address.port}",
@@ -173,18 +611,8 @@ class MinecraftAAA3A(Cog):
                 else discord.Color.green()
             )
         )
-        icon_file = None
-        icon = (
-            discord.File(
-                icon_file := BytesIO(
-                    base64.b64decode(status.icon.removeprefix("data:image/png;base64,"))
-                ),
-                filename="icon.png",
-            )
-            if status.icon
-            else None
-        )
-        if icon:
+        icon = self.get_icon(status)
+        if icon is not None:
             embed.set_thumbnail(url="attachment://icon.png")
         embed.add_field(name=_("Latency"), value=f"{status.latency:.2f} ms")
         embed.add_field(
@@ -211,32 +639,93 @@ class MinecraftAAA3A(Cog):
             name=_("Version"),
             value=f"{status.version.name}\nProtocol: {status.version.protocol}",
         )
-        if icon_file is not None:
-            icon_file.close()
         return embed, icon
 
     async def clear_mcformatting(self, formatted_str) -> str:
         """Remove Minecraft-formatting"""
+        return self._clear_mcformatting(formatted_str)
+
+    def _clear_mcformatting(self, formatted_str) -> str:
+        key = (
+            json.dumps(formatted_str, sort_keys=True)
+            if isinstance(formatted_str, dict)
+            else formatted_str
+        )
+        if (clean := self.motd_cache.get(key)) is not None:
+            return clean
         if not isinstance(formatted_str, dict):
-            return re.sub(r"\xA7[0-9A-FK-OR]", "", formatted_str, flags=re.IGNORECASE)
-        clean = ""
-        async for text in self.gen_dict_extract("text", formatted_str):
-            clean += text
-        return re.sub(r"\xA7[0-9A-FK-OR]", "", clean, flags=re.IGNORECASE)
+            clean = re.sub(r"\xA7[0-9A-FK-OR]", "", formatted_str, flags=re.IGNORECASE)
+        else:
+            clean = re.sub(
+                r"\xA7[0-9A-FK-OR]",
+                "",
+                "".join(self.gen_dict_extract("text", formatted_str)),
+                flags=re.IGNORECASE,
+            )
+        if len(self.motd_cache) >= MOTD_CACHE_SIZE:
+            self.motd_cache.clear()
+        self.motd_cache[key] = clean
+        return clean
 
-    async def gen_dict_extract(self, key: str, var: dict) -> str:
+    def gen_dict_extract(self, key: str, var: dict) -> typing.Iterator[str]:
         if not hasattr(var, "items"):
             return
         for k, v in var.items():
             if k == key:
                 yield v
             if isinstance(v, typing.Dict):
-                async for result in self.gen_dict_extract(key, v):
-                    yield result
+                yield from self.gen_dict_extract(key, v)
             elif isinstance(v, typing.List):
                 for d in v:
-                    async for result in self.gen_dict_extract(key, d):
-                        yield result
+                    yield from self.gen_dict_extract(key, d)
+
+    def cache_profile(self, name: str, response_data: typing.Optional[dict]) -> None:
+        now = time.monotonic()
+        if len(self.profile_cache) >= PROFILE_CACHE_SIZE:
+            self.profile_cache = {
+                _name: cached for _name, cached in self.profile_cache.items() if cached[0] > now
+            }
+        found = response_data is not None and "id" in response_data
+        self.profile_cache[name.lower()] = (
+            now + (PROFILE_CACHE_TTL if found else PROFILE_NOT_FOUND_TTL),
+            response_data,
+        )
+
+    async def get_skin_images(
+        self, uuid: str, overlay: bool = False
+    ) -> typing.Tuple[bytes, bytes, bytes]:
+        """Get the head render, the skin and the body render of a player."""
+        key = (uuid, overlay)
+        if (cached := self.skin_cache.get(key)) is not None:
+            if cached[0] > time.monotonic():
+                self.skin_cache.move_to_end(key)
+                return cached[1]
+            self.skin_cache_size -= sum(len(image) for image in cached[1])
+            del self.skin_cache[key]
+
+        async def fetch(url: str, params: typing.Optional[str] = None) -> bytes:
+            async with self._session.get(url, params=params, raise_for_status=True) as s:
+                return await s.read()
+
+        images = tuple(
+            await asyncio.gather(
+                fetch(
+                    f"https://crafatar.com/renders/head/{uuid}",
+                    params="overlay" if overlay else None,
+                ),
+                fetch(f"https://crafatar.com/skins/{uuid}"),
+                fetch(
+                    f"https://crafatar.com/renders/body/{uuid}.png",
+                    params="overlay" if overlay else None,
+                ),
+            )
+        )
+        self.skin_cache[key] = (time.monotonic() + SKIN_CACHE_TTL, images)
+        self.skin_cache_size += sum(len(image) for image in images)
+        while self.skin_cache_size > SKIN_CACHE_MAX_BYTES and self.skin_cache:
+            __, (__, evicted_images) = self.skin_cache.popitem(last=False)
+            self.skin_cache_size -= sum(len(image) for image in evicted_images)
+        return images
 
     @commands.hybrid_group()
     async def minecraftaaa3a(self, ctx: commands.Context):
@@ -251,28 +740,17 @@ class MinecraftAAA3A(Cog):
         """Get Minecraft Java player skin by name."""
         uuid = player.uuid
         stripname = player.name.strip("_")
-        files = []
         try:
-            async with self._session.get(
-                f"https://crafatar.com/renders/head/{uuid}",
-                params="overlay" if overlay else None,
-            ) as s:
-                files.append(
-                    discord.File(BytesIO(await s.read()), filename=f"{stripname}_head.png")
-                )
-            async with self._session.get(f"https://crafatar.com/skins/{uuid}") as s:
-                files.append(discord.File(BytesIO(await s.read()), filename=f"{stripname}.png"))
-            async with self._session.get(
-                f"https://crafatar.com/renders/body/{uuid}.png",
-                params="overlay" if overlay else None,
-            ) as s:
-                files.append(
-                    discord.File(BytesIO(await s.read()), filename=f"{stripname}_body.png")
-                )
+            head, skin, body = await self.get_skin_images(uuid, overlay=overlay)
         except aiohttp.ClientResponseError as e:
             raise commands.UserFeedbackCheckFailure(
                 _("Unable to get data from Crafatar: {}").format(e.message)
             )
+        files = [
+            discord.File(BytesIO(head), filename=f"{stripname}_head.png"),
+            discord.File(BytesIO(skin), filename=f"{stripname}.png"),
+            discord.File(BytesIO(body), filename=f"{stripname}_body.png"),
+        ]
         embed: discord.Embed = discord.Embed(
             timestamp=ctx.message.created_at, color=await ctx.embed_color()
         )
@@ -291,7 +769,7 @@ class MinecraftAAA3A(Cog):
     async def getserver(self, ctx: commands.Context, server_url: str) -> None:
         """Get informations about a Minecraft Java server."""
         try:
-            server: JavaServer = await JavaServer.async_lookup(address=server_url.lower())
+            server: JavaServer = await self.resolver.lookup(server_url)
             status = await server.async_status()
         except Exception:
             raise commands.UserFeedbackCheckFailure(
@@ -300,7 +778,70 @@ class MinecraftAAA3A(Cog):
                 )
             )
         embed, icon = await self.get_embed(server, status)
-        await ctx.send(embed=embed, file=icon)
+        await ctx.send(embed=embed, file=self.get_icon_file(icon))
+
+    def check_followed_server(self, guild: discord.Guild, server_url: str) -> str:
+        server_url = server_url.lower()
+        if not any(
+            guild.get_channel(channel_id) is not None
+            for channel_id in self.registry.get(server_url, ())
+        ):
+            raise commands.UserFeedbackCheckFailure(
+                _("This server isn't followed in a channel of this guild.")
+            )
+        return server_url
+
+    @commands.guild_only()
+    @commands.bot_has_permissions(embed_links=True)
+    @minecraftaaa3a.command()
+    async def uptime(self, ctx: commands.Context, server_url: str) -> None:
+        """Get the uptime of a Minecraft Java server followed in this guild."""
+        server_url = self.check_followed_server(ctx.guild, server_url)
+        periods = {
+            24 * 60 * 60: _("24 hours"),
+            7 * 24 * 60 * 60: _("7 days"),
+            30 * 24 * 60 * 60: _("30 days"),
+            365 * 24 * 60 * 60: _("365 days"),
+        }
+        uptimes = await self.server_history.get_uptimes(server_url, periods=periods)
+        embed: discord.Embed = discord.Embed(
+            title=_("Uptime of {server_url}").format(server_url=server_url),
+            color=await ctx.embed_color(),
+        )
+        for period, name in periods.items():
+            embed.add_field(
+                name=name,
+                value=f"{uptimes[period]:.2%}" if uptimes[period] is not None else _("No data."),
+            )
+        await ctx.send(embed=embed)
+
+    @commands.guild_only()
+    @commands.bot_has_permissions(attach_files=True)
+    @minecraftaaa3a.command()
+    async def history(
+        self,
+        ctx: commands.Context,
+        server_url: str,
+        days: commands.Range[int, 1, 365] = 1,
+    ) -> None:
+        """Get a chart of the players, latency and uptime of a Minecraft Java server followed in this guild."""
+        server_url = self.check_followed_server(ctx.guild, server_url)
+        series = await self.server_history.get_chart_series(
+            server_url, since=time.time() - days * 24 * 60 * 60
+        )
+        if series is None:
+            raise commands.UserFeedbackCheckFailure(
+                _("Not enough data for this server yet. Try again later.")
+            )
+        async with ctx.typing():
+            chart = await asyncio.to_thread(
+                render_history_chart,
+                _("{server_url} over the last {days} day(s)").format(
+                    server_url=server_url, days=days
+                ),
+                *series,
+            )
+        await ctx.send(file=discord.File(BytesIO(chart), filename="history.png"))
 
     @commands.admin_or_permissions(manage_guild=True)
     @minecraftaaa3a.command(aliases=["add", "+"])
@@ -322,11 +863,11 @@ class MinecraftAAA3A(Cog):
                     "I don't have sufficient permissions in this channel to send messages with embeds."
                 )
             )
-        servers = await self.config.channel(channel).servers()
+        servers = self.get_channel_settings(channel.id)["servers"]
         if server_url.lower() in servers:
             raise commands.UserFeedbackCheckFailure(_("This server has already been added."))
         try:
-            server: JavaServer = await JavaServer.async_lookup(address=server_url.lower())
+            server: JavaServer = await self.resolver.lookup(server_url)
             await server.async_status()
         except Exception:
             raise commands.UserFeedbackCheckFailure(
@@ -334,10 +875,9 @@ class MinecraftAAA3A(Cog):
                     "No data found for this Minecraft server. Maybe it doesn't exist or its data are temporarily unavailable."
                 )
             )
-        if isinstance(servers, typing.List):
-            servers = {server: None for server in servers}
         servers[server_url.lower()] = None  # last message
         await self.config.channel(channel).servers.set(servers)
+        self.register_server(channel.id, server_url.lower())
         await ctx.send(_("Server added to this channel."))
 
     @commands.admin_or_permissions(manage_guild=True)
@@ -348,13 +888,12 @@ class MinecraftAAA3A(Cog):
         """Remove a Minecraft Java server in Config."""
         if channel is None:
             channel = ctx.channel
-        servers = await self.config.channel(channel).servers()
+        servers = self.get_channel_settings(channel.id)["servers"]
         if server_url.lower() not in servers:
             raise commands.UserFeedbackCheckFailure(_("This server isn't in the Config."))
-        if isinstance(servers, typing.List):
-            servers = {server: None for server in servers}
         del servers[server_url.lower()]
         await self.config.channel(channel).servers.set(servers)
+        self.unregister_server(channel.id, server_url.lower())
         await ctx.send(_("Server removed from this channel."))
 
     @commands.admin_or_permissions(manage_guild=True)
@@ -366,9 +905,12 @@ class MinecraftAAA3A(Cog):
         if channel is None:
             channel = ctx.channel
         await self.config.channel(channel).check_players.set(state)
+        self.get_channel_settings(channel.id)["check_players"] = state
         if not state:
-            for server_url in self.cache[channel.id]:
-                self.cache[channel.id][server_url]["status"].raw["players"]["sample"] = {}
+            for server_url in self.cache.get(channel.id, {}):
+                self.cache[channel.id][server_url]["fingerprint"] = self.cache[channel.id][
+                    server_url
+                ]["fingerprint"].for_channel(False)
             await ctx.send(_("I will not check players for the notifications."))
         else:
             await ctx.send(_("I will check players for the notifications."))
@@ -382,6 +924,7 @@ class MinecraftAAA3A(Cog):
         if channel is None:
             channel = ctx.channel
         await self.config.channel(channel).edit_last_message.set(state)
+        self.get_channel_settings(channel.id)["edit_last_message"] = state
         if not state:
             await ctx.send(_("I will not edit my last message for the notifications."))
         else:
@@ -391,7 +934,7 @@ class MinecraftAAA3A(Cog):
     @minecraftaaa3a.command(hidden=True)
     async def forcecheck(self, ctx: commands.Context) -> None:
         """Force check Minecraft Java servers in Config."""
-        await self.check_servers()
+        await self.check_servers(force=True)
         await ctx.send(_("Servers checked."))
 
     @commands.is_owner()
@@ -402,6 +945,86 @@ class MinecraftAAA3A(Cog):
         embeds = [loop.get_debug_embed() for loop in self.loops]
         await Menu(pages=embeds).start(ctx)
 
+    @commands.is_owner()
+    @commands.bot_has_permissions(embed_links=True)
+    @minecraftaaa3a.command(hidden=True)
+    async def getmonitormetrics(self, ctx: commands.Context) -> None:
+        """Get the metrics of the last check cycles, to size the probes concurrency and spot slow servers."""
+        if not self.cycles_metrics:
+            raise commands.UserFeedbackCheckFailure(_("No check cycle has run yet."))
+        cycles = list(self.cycles_metrics)
+        probe_durations = [
+            duration for metrics in cycles for duration in metrics.probe_durations
+        ]
+        embed: discord.Embed = discord.Embed(
+            title=_("Monitor Metrics"),
+            description=_(
+                "Over the last {count} check cycle(s), since <t:{since}:R>. {servers} server(s) followed, {concurrency} probes at most at the same time."
+            ).format(
+                count=len(cycles),
+                since=int(cycles[0].started_at),
+                servers=len(self.registry),
+                concurrency=PROBE_CONCURRENCY,
+            ),
+            color=await ctx.embed_color(),
+        )
+        durations = [metrics.duration for metrics in cycles]
+        embed.add_field(
+            name=_("Cycle Duration"),
+            value=_("Average: {average:.2f}s\nMax: {max:.2f}s\nLast: {last:.2f}s").format(
+                average=sum(durations) / len(durations), max=max(durations), last=durations[-1]
+            ),
+        )
+        embed.add_field(
+            name=_("Probes"),
+            value=_(
+                "Count: {count}\np50: {p50}\np95: {p95}\np99: {p99}\nSemaphore Wait: {wait:.2f}s"
+            ).format(
+                count=len(probe_durations),
+                **{
+                    f"p{percent}": (
+                        f"{value * 1000:.0f} ms"
+                        if (value := percentile(probe_durations, percent)) is not None
+                        else "-"
+                    )
+                    for percent in (50, 95, 99)
+                },
+                wait=sum(metrics.probe_wait for metrics in cycles),
+            ),
+        )
+        embed.add_field(
+            name=_("Failures"),
+            value=_("Timeouts: {timeouts}\nErrors: {errors}").format(
+                timeouts=sum(metrics.timeouts for metrics in cycles),
+                errors=sum(metrics.errors for metrics in cycles),
+            ),
+        )
+        embed.add_field(
+            name=_("Notifications"),
+            value=_("Sent: {count}\nDiscord API Time: {time:.2f}s").format(
+                count=sum(metrics.notifications for metrics in cycles),
+                time=sum(metrics.discord_time for metrics in cycles),
+            ),
+        )
+        slowest_servers = sorted(
+            (
+                (percentile(durations, 50), server_url)
+                for server_url, durations in self.probe_durations.items()
+                if durations
+            ),
+            reverse=True,
+        )[:5]
+        if slowest_servers:
+            embed.add_field(
+                name=_("Slowest Servers (median probe)"),
+                value="\n".join(
+                    f"`{server_url}`: {duration * 1000:.0f} ms"
+                    for duration, server_url in slowest_servers
+                ),
+                inline=False,
+            )
+        await ctx.send(embed=embed)
+
     @commands.Cog.listener()
     async def on_assistant_cog_add(
         self, assistant_cog: typing.Optional[commands.Cog] = None
@@ -426,7 +1049,7 @@ class MinecraftAAA3A(Cog):
 
     async def get_minecraft_java_server_for_assistant(self, server_url: str, *args, **kwargs):
         try:
-            server: JavaServer = await JavaServer.async_lookup(address=server_url.lower())
+            server: JavaServer = await self.resolver.lookup(server_url)
             status = await server.async_status()
         except Exception:
             return "No data found for this Minecraft Java server."
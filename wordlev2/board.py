@@ -0,0 +1,208 @@
+import typing  # isort:skip
+
+import asyncio
+import io
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+TILE_SIZE: int = 70
+TILE_SPACING: int = 10
+BOARD_BORDER: int = 5
+BACKGROUND: typing.Tuple[int, int, int] = (255, 255, 255)
+OUTLINE: typing.Tuple[int, int, int] = (211, 214, 218)
+LETTER: typing.Tuple[int, int, int] = (255, 255, 255)
+GREEN: typing.Tuple[int, int, int] = (106, 170, 100)
+YELLOW: typing.Tuple[int, int, int] = (202, 180, 86)
+GREY: typing.Tuple[int, int, int] = (120, 124, 126)
+PNG_COLORS: int = 32  # Boards are encoded with a palette: a few flat colors and the letters antialiasing.
+RENDER_WORKERS: int = 2  # Threads rendering boards off the event loop...
+RENDER_QUEUE_SIZE: int = 16  # ... and renders queued at most, the next ones wait for a slot.
+RENDER_SAMPLES: int = 500  # Durations kept to compute percentiles.
+
+
+def score_attempt(word: str, attempt: str) -> typing.List[typing.Tuple[int, int, int]]:
+    """Color of each letter of an attempt, in two passes.
+
+    Letters at the right place are green first, then each other letter is yellow as long as the
+    word has occurrences of it left, so a repeated letter isn't yellow more times than it's in the word.
+    """
+    colors = [GREY] * len(attempt)
+    remaining = Counter()
+    for i, (letter, expected) in enumerate(zip(attempt, word)):
+        if letter == expected:
+            colors[i] = GREEN
+        else:
+            remaining[expected] += 1
+    for i, letter in enumerate(attempt):
+        if colors[i] is not GREEN and remaining[letter] > 0:
+            colors[i] = YELLOW
+            remaining[letter] -= 1
+    return colors
+
+
+class BoardRenderer:
+    """Compose boards by pasting tiles rasterized once per letter and color."""
+
+    def __init__(self, font: ImageFont.FreeTypeFont) -> None:
+        self.font: ImageFont.FreeTypeFont = font
+        self.tiles: typing.Dict[typing.Tuple[str, typing.Tuple[int, int, int]], Image.Image] = {}
+        self.empty_boards: typing.Dict[typing.Tuple[int, int], Image.Image] = {}
+        self.empty_pngs: typing.Dict[typing.Tuple[int, int], bytes] = {}
+        # Boards are rendered in several threads, but FreeType faces aren't thread-safe.
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def tile_position(row: int, column: int) -> typing.Tuple[int, int]:
+        return (
+            BOARD_BORDER + (column + 1) * TILE_SPACING + column * TILE_SIZE,
+            BOARD_BORDER + (row + 1) * TILE_SPACING + row * TILE_SIZE,
+        )
+
+    def get_tile(self, letter: str, color: typing.Tuple[int, int, int]) -> Image.Image:
+        if (tile := self.tiles.get((letter, color))) is not None:
+            return tile
+        with self._lock:
+            if (tile := self.tiles.get((letter, color))) is not None:
+                return tile
+            # One pixel more than the size, as the rectangles of the boards include both their edges.
+            tile = Image.new("RGB", (TILE_SIZE + 1, TILE_SIZE + 1), color)
+            draw = ImageDraw.Draw(tile)
+            s = self.font.getlength(letter.upper())
+            draw.text(
+                (TILE_SIZE // 2 - s // 2, -TILE_SIZE * 0.36),
+                letter.upper(),
+                font=self.font,
+                fill=LETTER,
+            )
+            self.tiles[(letter, color)] = tile
+            return tile
+
+    def get_empty_board(self, length: int, max_attempts: int) -> Image.Image:
+        """The board with the outlines of all the tiles, drawn once per size. Don't modify it."""
+        if (board := self.empty_boards.get((length, max_attempts))) is not None:
+            return board
+        with self._lock:
+            if (board := self.empty_boards.get((length, max_attempts))) is not None:
+                return board
+            board = Image.new(
+                "RGB",
+                (
+                    length * TILE_SIZE + (length + 1) * TILE_SPACING + 2 * BOARD_BORDER,
+                    max_attempts * TILE_SIZE + (max_attempts + 1) * TILE_SPACING + 2 * BOARD_BORDER,
+                ),
+                BACKGROUND,
+            )
+            draw = ImageDraw.Draw(board)
+            for row in range(max_attempts):
+                for column in range(length):
+                    x, y = self.tile_position(row, column)
+                    draw.rectangle(
+                        [(x, y), (x + TILE_SIZE, y + TILE_SIZE)], outline=OUTLINE, width=3
+                    )
+            self.empty_boards[(length, max_attempts)] = board
+            return board
+
+    def get_empty_png(self, length: int, max_attempts: int) -> bytes:
+        """The empty board encoded once per size, as every game starts with it."""
+        if (png := self.empty_pngs.get((length, max_attempts))) is None:
+            png = self.empty_pngs[(length, max_attempts)] = self.to_png(
+                self.get_empty_board(length, max_attempts)
+            ).getvalue()
+        return png
+
+    def draw_row(self, board: Image.Image, row: int, word: str, attempt: str) -> None:
+        for column, (letter, color) in enumerate(zip(attempt, score_attempt(word, attempt))):
+            board.paste(self.get_tile(letter, color), self.tile_position(row, column))
+
+    def render(
+        self,
+        word: str,
+        attempts: typing.List[str],
+        max_attempts: int = 6,
+        previous_board: typing.Optional[Image.Image] = None,
+    ) -> Image.Image:
+        """Render a board. If given, `previous_board` must have all the attempts but the last one."""
+        if previous_board is not None and attempts:
+            board = previous_board.copy()
+            self.draw_row(board, len(attempts) - 1, word, attempts[-1])
+            return board
+        board = self.get_empty_board(len(word), max_attempts).copy()
+        for row, attempt in enumerate(attempts):
+            self.draw_row(board, row, word, attempt)
+        return board
+
+    @staticmethod
+    def to_png(board: Image.Image) -> io.BytesIO:
+        buffer = io.BytesIO()
+        # Smaller to upload than RGB, and faster to encode too.
+        board.quantize(colors=PNG_COLORS, method=Image.Quantize.FASTOCTREE).save(buffer, "png")
+        buffer.seek(0)
+        return buffer
+
+
+def percentile(values: typing.Iterable[float], percent: float) -> typing.Optional[float]:
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class RenderPool:
+    """Render boards in a bounded thread pool, so games don't block the event loop.
+
+    When all the slots are taken, callers wait before submitting their render (backpressure),
+    instead of piling up work in the executor queue.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS, queue_size: int = RENDER_QUEUE_SIZE) -> None:
+        self.workers: int = workers
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="wordle_render"
+        )
+        self.slots: asyncio.Semaphore = asyncio.Semaphore(workers + queue_size)
+        self.waiting: int = 0  # Renders waiting for a slot.
+        self.in_flight: int = 0  # Renders queued or running in the executor.
+        self.max_depth: int = 0
+        self.renders: int = 0
+        self.render_times: typing.Deque[float] = deque(maxlen=RENDER_SAMPLES)
+        self.wait_times: typing.Deque[float] = deque(maxlen=RENDER_SAMPLES)
+
+    @property
+    def depth(self) -> int:
+        return self.waiting + self.in_flight
+
+    async def run(self, function: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any:
+        queued_at = time.monotonic()
+        self.waiting += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            start, end, result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._timed, function, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+        self.renders += 1
+        self.wait_times.append(start - queued_at)
+        self.render_times.append(end - start)
+        return result
+
+    @staticmethod
+    def _timed(
+        function: typing.Callable[..., typing.Any], *args: typing.Any
+    ) -> typing.Tuple[float, float, typing.Any]:
+        start = time.monotonic()
+        result = function(*args)
+        return start, time.monotonic(), result
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
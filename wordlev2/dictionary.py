@@ -0,0 +1,118 @@
+import typing  # isort:skip
+
+import hashlib
+import mmap
+import os
+import struct
+from collections import defaultdict
+from pathlib import Path
+
+# Binary dictionary file:
+# - a header: magic, format version, fingerprint of the source files and number of buckets;
+# - a bucket per word length: length, width in bytes, number of words and offset of the words;
+# - the words of each bucket, encoded in UTF-8, padded with null bytes to the bucket width and sorted.
+MAGIC: bytes = b"WDLD"
+VERSION: int = 2  # 2: words are normalized.
+HEADER: struct.Struct = struct.Struct("<4sH16sH")
+BUCKET: struct.Struct = struct.Struct("<HHII")
+
+
+def get_fingerprint(sources: typing.Iterable[Path]) -> bytes:
+    """Identify the source files by their size and modification time, without reading them."""
+    fingerprint = hashlib.blake2b(str(VERSION).encode(), digest_size=16)
+    for source in sources:
+        if source.exists():
+            stat = source.stat()
+            fingerprint.update(f"{source.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return fingerprint.digest()
+
+
+def build_dictionary(
+    path: Path, words: typing.Iterable[str], fingerprint: bytes
+) -> None:
+    buckets: typing.Dict[int, typing.Set[bytes]] = defaultdict(set)
+    for word in words:
+        buckets[len(word)].add(word.encode("utf-8"))
+    header = HEADER.pack(MAGIC, VERSION, fingerprint, len(buckets))
+    offset = HEADER.size + len(buckets) * BUCKET.size
+    table, data = [], []
+    for length, encoded_words in sorted(buckets.items()):
+        width = max(len(encoded_word) for encoded_word in encoded_words)
+        table.append(BUCKET.pack(length, width, len(encoded_words), offset))
+        bucket = b"".join(
+            encoded_word.ljust(width, b"\0") for encoded_word in sorted(encoded_words)
+        )
+        data.append(bucket)
+        offset += len(bucket)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    with temp_path.open(mode="wb") as file:
+        file.write(header)
+        file.writelines(table)
+        file.writelines(data)
+    os.replace(temp_path, path)  # Never leave a half-written dictionary.
+
+
+class BinaryDictionary:
+    """A dictionary file mapped in memory: pages are read on demand and shared, words are found by binary search."""
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        with path.open(mode="rb") as file:
+            self._mmap: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.fingerprint, bucket_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} isn't a dictionary file of version {VERSION}.")
+        # Length -> (width, count, offset)
+        self.buckets: typing.Dict[int, typing.Tuple[int, int, int]] = {}
+        for i in range(bucket_count):
+            length, width, count, offset = BUCKET.unpack_from(
+                self._mmap, HEADER.size + i * BUCKET.size
+            )
+            self.buckets[length] = (width, count, offset)
+
+    @classmethod
+    def load(
+        cls, path: Path, sources: typing.List[Path], get_words: typing.Callable[[], typing.Iterable[str]]
+    ) -> "BinaryDictionary":
+        """Open the dictionary file, building it first if missing or older than its sources."""
+        fingerprint = get_fingerprint(sources)
+        if path.exists():
+            try:
+                dictionary = cls(path)
+            except (ValueError, struct.error):
+                pass
+            else:
+                if dictionary.fingerprint == fingerprint:
+                    return dictionary
+                dictionary.close()
+        build_dictionary(path, get_words(), fingerprint)
+        return cls(path)
+
+    def __contains__(self, word: str) -> bool:
+        if (bucket := self.buckets.get(len(word))) is None:
+            return False
+        width, count, offset = bucket
+        encoded_word = word.encode("utf-8")
+        if len(encoded_word) > width:
+            return False
+        encoded_word = encoded_word.ljust(width, b"\0")
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            start = offset + middle * width
+            current = self._mmap[start : start + width]
+            if current < encoded_word:
+                low = middle + 1
+            elif current > encoded_word:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return sum(count for _width, count, _offset in self.buckets.values())
+
+    def close(self) -> None:
+        self._mmap.close()
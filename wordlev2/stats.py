@@ -0,0 +1,289 @@
+import typing  # isort:skip
+
+import asyncio
+import json
+import sqlite3
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+MAX_ATTEMPTS: int = 10
+
+
+class MemberStats:
+    __slots__ = ("games", "wins", "guess_distribution")
+
+    def __init__(
+        self,
+        games: int = 0,
+        wins: int = 0,
+        guess_distribution: typing.Optional[typing.List[int]] = None,
+    ) -> None:
+        self.games: int = games
+        self.wins: int = wins
+        self.guess_distribution: typing.List[int] = guess_distribution or [0] * MAX_ATTEMPTS
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0
+
+    @property
+    def average_guesses(self) -> typing.Optional[float]:
+        """Average number of attempts of the won games."""
+        if not self.wins:
+            return None
+        return (
+            sum(i * count for i, count in enumerate(self.guess_distribution, start=1)) / self.wins
+        )
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "guess_distribution": self.guess_distribution.copy(),
+        }
+
+
+class GuildStats:
+    """Stats of the members of a guild, with rankings computed once after each change."""
+
+    RANKINGS: typing.Dict[str, typing.Callable[[MemberStats], float]] = {
+        "wins": lambda stats: stats.wins,
+        "games": lambda stats: stats.games,
+        "winrate": lambda stats: stats.win_rate,
+    }
+
+    def __init__(self, members: typing.Dict[int, MemberStats]) -> None:
+        self.members: typing.Dict[int, MemberStats] = members
+        self._rankings: typing.Dict[str, typing.List[typing.Tuple[float, int]]] = {}
+
+    def invalidate(self) -> None:
+        self._rankings.clear()
+
+    def ranking(self, key: str) -> typing.List[typing.Tuple[float, int]]:
+        """`(value, member_id)` of the members who played, sorted by increasing value."""
+        if (ranking := self._rankings.get(key)) is None:
+            ranking = self._rankings[key] = sorted(
+                (self.RANKINGS[key](stats), member_id)
+                for member_id, stats in self.members.items()
+                if stats.games
+            )
+        return ranking
+
+    def leaderboard(self, key: str) -> typing.List[typing.Tuple[int, MemberStats]]:
+        return [
+            (member_id, self.members[member_id])
+            for _value, member_id in reversed(self.ranking(key))
+        ]
+
+    def percentile(self, key: str, member_id: int) -> typing.Optional[float]:
+        """Share of the other players with a strictly lower value than the member."""
+        if (stats := self.members.get(member_id)) is None or not stats.games:
+            return None
+        ranking = self.ranking(key)
+        if len(ranking) == 1:
+            return 1.0
+        lower = bisect_left(ranking, (self.RANKINGS[key](stats), -1))
+        return lower / (len(ranking) - 1)
+
+
+class StatsStore:
+    """Games stats in SQLite, cached in memory per guild and written behind in batches."""
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        self.guilds: typing.Dict[int, GuildStats] = {}
+        self.dirty: typing.Set[typing.Tuple[int, int]] = set()  # (guild ID, member ID)
+        # (guild ID, day, lang, length) -> member ID -> (won, attempts), for the recent days only.
+        self.daily: typing.Dict[
+            typing.Tuple[int, int, str, int], typing.Dict[int, typing.Tuple[bool, int]]
+        ] = {}
+        self.dirty_daily: typing.List[typing.Tuple[int, int, str, int, int, bool, int]] = []
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    @contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _create_tables(self) -> bool:
+        """Create the tables if needed, and return if the stats table is empty."""
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                "guild_id INTEGER NOT NULL, member_id INTEGER NOT NULL, games INTEGER NOT NULL, "
+                "wins INTEGER NOT NULL, guess_distribution TEXT NOT NULL, "
+                "PRIMARY KEY (guild_id, member_id)) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS daily ("
+                "guild_id INTEGER NOT NULL, day INTEGER NOT NULL, lang TEXT NOT NULL, length INTEGER NOT NULL, "
+                "member_id INTEGER NOT NULL, won INTEGER NOT NULL, attempts INTEGER NOT NULL, "
+                "PRIMARY KEY (guild_id, day, lang, length, member_id)) WITHOUT ROWID"
+            )
+            return connection.execute("SELECT 1 FROM stats LIMIT 1").fetchone() is None
+
+    async def load(self) -> bool:
+        return await asyncio.to_thread(self._create_tables)
+
+    def _read_guild(self, guild_id: int) -> typing.Dict[int, MemberStats]:
+        with self._connect() as connection:
+            return {
+                member_id: MemberStats(games, wins, json.loads(guess_distribution))
+                for member_id, games, wins, guess_distribution in connection.execute(
+                    "SELECT member_id, games, wins, guess_distribution FROM stats WHERE guild_id = ?",
+                    (guild_id,),
+                )
+            }
+
+    async def get_guild(self, guild_id: int) -> GuildStats:
+        if (guild_stats := self.guilds.get(guild_id)) is None:
+            async with self._lock:
+                if (guild_stats := self.guilds.get(guild_id)) is None:
+                    guild_stats = self.guilds[guild_id] = GuildStats(
+                        await asyncio.to_thread(self._read_guild, guild_id)
+                    )
+        return guild_stats
+
+    async def get_member(self, guild_id: int, member_id: int) -> MemberStats:
+        return (await self.get_guild(guild_id)).members.get(member_id) or MemberStats()
+
+    async def record_game(
+        self, guild_id: int, member_id: int, has_won: bool, attempts: int
+    ) -> None:
+        guild_stats = await self.get_guild(guild_id)
+        if (stats := guild_stats.members.get(member_id)) is None:
+            stats = guild_stats.members[member_id] = MemberStats()
+        stats.games += 1
+        if has_won:
+            stats.wins += 1
+            stats.guess_distribution[attempts - 1] += 1
+        guild_stats.invalidate()
+        self.dirty.add((guild_id, member_id))
+
+    def _write(
+        self,
+        rows: typing.List[typing.Tuple[int, int, int, int, str]],
+        daily_rows: typing.List[typing.Tuple[int, int, str, int, int, bool, int]],
+    ) -> None:
+        with self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?, ?)", rows)
+            connection.executemany(
+                "INSERT OR IGNORE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?)", daily_rows
+            )
+
+    async def flush(self) -> None:
+        """Write the stats changed since the last flush, in one transaction."""
+        if not self.dirty and not self.dirty_daily:
+            return
+        async with self._lock:  # Not while a member is being deleted.
+            dirty, self.dirty = self.dirty, set()
+            daily_rows, self.dirty_daily = self.dirty_daily, []
+            rows = []
+            for guild_id, member_id in dirty:
+                stats = self.guilds[guild_id].members[member_id]
+                rows.append(
+                    (
+                        guild_id,
+                        member_id,
+                        stats.games,
+                        stats.wins,
+                        json.dumps(stats.guess_distribution),
+                    )
+                )
+            try:
+                await asyncio.to_thread(self._write, rows, daily_rows)
+            except Exception:
+                # Written on the next flush instead.
+                self.dirty |= dirty
+                self.dirty_daily[:0] = daily_rows
+                raise
+
+    def _read_daily(
+        self, guild_id: int, day: int, lang: str, length: int
+    ) -> typing.Dict[int, typing.Tuple[bool, int]]:
+        with self._connect() as connection:
+            return {
+                member_id: (bool(won), attempts)
+                for member_id, won, attempts in connection.execute(
+                    "SELECT member_id, won, attempts FROM daily "
+                    "WHERE guild_id = ? AND day = ? AND lang = ? AND length = ?",
+                    (guild_id, day, lang, length),
+                )
+            }
+
+    async def get_daily(
+        self, guild_id: int, day: int, lang: str, length: int
+    ) -> typing.Dict[int, typing.Tuple[bool, int]]:
+        """Results of the daily puzzle of a guild: member ID -> (won, attempts)."""
+        key = (guild_id, day, lang, length)
+        if (results := self.daily.get(key)) is None:
+            async with self._lock:
+                if (results := self.daily.get(key)) is None:
+                    # Results of the previous days aren't needed anymore.
+                    for old_key in [old_key for old_key in self.daily if old_key[1] < day - 1]:
+                        del self.daily[old_key]
+                    results = self.daily[key] = await asyncio.to_thread(
+                        self._read_daily, guild_id, day, lang, length
+                    )
+        return results
+
+    async def record_daily(
+        self,
+        guild_id: int,
+        day: int,
+        lang: str,
+        length: int,
+        member_id: int,
+        has_won: bool,
+        attempts: int,
+    ) -> None:
+        results = await self.get_daily(guild_id, day, lang, length)
+        if member_id in results:
+            return
+        results[member_id] = (has_won, attempts)
+        self.dirty_daily.append((guild_id, day, lang, length, member_id, has_won, attempts))
+
+    def _import(self, rows: typing.List[typing.Tuple[int, int, int, int, str]]) -> None:
+        with self._connect() as connection:
+            connection.executemany("INSERT OR IGNORE INTO stats VALUES (?, ?, ?, ?, ?)", rows)
+
+    async def import_members(
+        self, all_members: typing.Dict[int, typing.Dict[int, typing.Dict[str, typing.Any]]]
+    ) -> None:
+        """Import the stats stored in Config by the previous versions."""
+        rows = [
+            (
+                guild_id,
+                member_id,
+                data["games"],
+                data["wins"],
+                json.dumps(data["guess_distribution"]),
+            )
+            for guild_id, members in all_members.items()
+            for member_id, data in members.items()
+            if data.get("games")
+        ]
+        async with self._lock:
+            await asyncio.to_thread(self._import, rows)
+        self.guilds.clear()
+
+    def _delete_member(self, member_id: int) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM stats WHERE member_id = ?", (member_id,))
+            connection.execute("DELETE FROM daily WHERE member_id = ?", (member_id,))
+
+    async def delete_member(self, member_id: int) -> None:
+        async with self._lock:
+            for guild_id, guild_stats in self.guilds.items():
+                if guild_stats.members.pop(member_id, None) is not None:
+                    guild_stats.invalidate()
+                self.dirty.discard((guild_id, member_id))
+            for results in self.daily.values():
+                results.pop(member_id, None)
+            self.dirty_daily = [row for row in self.dirty_daily if row[4] != member_id]
+            await asyncio.to_thread(self._delete_member, member_id)
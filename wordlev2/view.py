@@ -6,7 +6,9 @@ import typing  # isort:skip
 
 import asyncio
 import random
+import time
 
+from PIL import Image
 from redbot.core.utils.menus import start_adding_reactions
 from redbot.core.utils.predicates import MessagePredicate
 
@@ -43,6 +45,38 @@ DIACRITIC_SYMBOLS: typing.Dict[str, str] = {
     "u": "ùúûü",
     "y": "ýÿ",
 }
+GREEK_SYMBOLS: typing.Dict[str, str] = {
+    "α": "ά",
+    "ε": "έ",
+    "η": "ή",
+    "ι": "ίϊΐ",
+    "ο": "ό",
+    "υ": "ύϋΰ",
+    "ω": "ώ",
+    "σ": "ς",
+}
+RUSSIAN_SYMBOLS: typing.Dict[str, str] = {"е": "ё"}
+# ç, ö and ü are letters of their own in Turkish, only the circumflex is dropped.
+TURKISH_SYMBOLS: typing.Dict[str, str] = {"a": "â", "i": "î", "u": "û"}
+NORMALIZATION_SYMBOLS: typing.Dict[Lang, typing.Dict[str, str]] = {
+    **{lang: DIACRITIC_SYMBOLS for lang in Lang},
+    Lang.ELLENIKA: GREEK_SYMBOLS,
+    Lang.RUSSIAN: RUSSIAN_SYMBOLS,
+    Lang.UKRAIHCBKA: {},
+    Lang.TURKCE: TURKISH_SYMBOLS,
+}
+# Built once. Every character is replaced by a single one, so the normalized words keep their length.
+NORMALIZATION_TABLES: typing.Dict[Lang, typing.Dict[int, str]] = {
+    lang: str.maketrans({v: key for key, value in symbols.items() for v in value})
+    for lang, symbols in NORMALIZATION_SYMBOLS.items()
+}
+
+
+def normalize(word: str, lang: Lang) -> str:
+    """Normalize a guess or a word of the dictionaries, so they can be compared."""
+    if lang is Lang.TURKCE:  # Dotted and dotless I.
+        word = word.replace("I", "ı").replace("İ", "i")
+    return word.lower().translate(NORMALIZATION_TABLES[lang])
 
 
 class WordleGameView(discord.ui.View):
@@ -52,6 +86,8 @@ class WordleGameView(discord.ui.View):
         lang: Lang = Lang.ENGLISH,
         length: int = 5,
         max_attempts: int = 6,
+        word: typing.Optional[str] = None,
+        daily: bool = False,
     ) -> None:
         super().__init__(timeout=60 * 10)
         self.ctx: commands.Context = None
@@ -60,27 +96,36 @@ class WordleGameView(discord.ui.View):
         self.length: int = length
         self.max_attempts: int = max_attempts
 
-        self.word: str = None
+        self.word: str = word  # Chosen randomly if not given.
+        self.daily: bool = daily  # The word is shared by the guild, it must not be spoiled.
+        self.solution: str = None  # The normalized word, compared with the attempts.
         self.has_won: bool = False
         self.attempts: typing.List[str] = []
         self._message: discord.Message = None
+        # Last rendered board, to only draw the new attempts.
+        self._board: typing.Optional[Image.Image] = None
 
     async def start(self, ctx: commands.Context) -> typing.Tuple[bool, typing.List[str]]:
         self.ctx: commands.Context = ctx
 
-        if not (words := self.cog.words[self.lang.value][self.length]):
-            raise commands.UserFeedbackCheckFailure(
-                _("There are no words in this language with {length} letters.").format(
-                    length=self.length
+        await self.cog.load_lang(self.lang)
+        if self.word is None:
+            if not (words := self.cog.words[self.lang.value].get(self.length)):
+                raise commands.UserFeedbackCheckFailure(
+                    _("There are no words in this language with {length} letters.").format(
+                        length=self.length
+                    )
                 )
-            )
-        self.word: str = random.choice(words)
+            self.word: str = random.choice(words)
+        self.solution: str = normalize(self.word, self.lang)
         self._message: discord.Message = await ctx.send(
             **await self.cog.get_kwargs(
                 self.ctx,
                 self.lang,
                 self.word,
                 max_attempts=self.max_attempts,
+                file=await self.render_board(),
+                spoiler=self.daily,
             ),
             view=self,
             reference=self.ctx.message.to_reference(fail_if_not_exists=False),
@@ -103,19 +148,16 @@ class WordleGameView(discord.ui.View):
                 if guess.content.lower() == "cancel":
                     await self.ctx.send(
                         _("You have cancelled the game. The word was: **{word}**.").format(
-                            word=self.word
+                            word=self.display_word
                         ),
                         reference=self._message.to_reference(fail_if_not_exists=False),
                         allowed_mentions=discord.AllowedMentions(replied_user=False),
                     )
                     break
 
-                attempt = guess.content.lower().translate(
-                    str.maketrans(
-                        {v: key for key, value in DIACRITIC_SYMBOLS.items() for v in value}
-                    )
-                )
-                if attempt not in self.cog.dictionaries[self.lang.value][self.length]:
+                self.cog.langs_last_use[self.lang.value] = time.monotonic()
+                attempt = normalize(guess.content, self.lang)
+                if attempt not in self.cog.dictionaries[self.lang.value]:
                     if ctx.bot_permissions.add_reactions:
                         start_adding_reactions(guess, "❌")
                     await self.ctx.send(
@@ -127,28 +169,42 @@ class WordleGameView(discord.ui.View):
                     continue
                 self.attempts.append(attempt)
 
+                kwargs = await self.cog.get_kwargs(
+                    self.ctx,
+                    self.lang,
+                    self.word,
+                    attempts=self.attempts,
+                    max_attempts=self.max_attempts,
+                    file=await self.render_board(),
+                    spoiler=self.daily,
+                )
                 try:
-                    await self._message.delete()
+                    # One request instead of deleting and sending again.
+                    self._message: discord.Message = await self._message.edit(
+                        embed=kwargs["embed"],
+                        attachments=[kwargs["file"]],
+                        allowed_mentions=kwargs["allowed_mentions"],
+                        view=self,
+                    )
                 except discord.HTTPException:
-                    pass
-                self._message: discord.Message = await ctx.send(
-                    **await self.cog.get_kwargs(
-                        self.ctx,
-                        self.lang,
-                        self.word,
-                        attempts=self.attempts,
-                        max_attempts=self.max_attempts,
-                    ),
-                    view=self,
-                    reference=self.ctx.message.to_reference(fail_if_not_exists=False),
-                )
-                self.cog.views[self._message] = self
-                if attempt == self.word:
+                    self.cog.views.pop(self._message, None)
+                    try:
+                        await self._message.delete()
+                    except discord.HTTPException:
+                        pass
+                    kwargs["file"].reset()
+                    self._message: discord.Message = await ctx.send(
+                        **kwargs,
+                        view=self,
+                        reference=self.ctx.message.to_reference(fail_if_not_exists=False),
+                    )
+                    self.cog.views[self._message] = self
+                if attempt == self.solution:
                     self.has_won = True
         except asyncio.TimeoutError:
             await self.ctx.send(
                 _("You took too long to guess the word. The word was: **{word}**.").format(
-                    word=self.word,
+                    word=self.display_word,
                 ),
                 reference=self._message.to_reference(fail_if_not_exists=False),
                 allowed_mentions=discord.AllowedMentions(replied_user=False),
@@ -159,8 +215,25 @@ class WordleGameView(discord.ui.View):
             await self._message.edit(view=self)
         except discord.HTTPException:
             pass
+        # The game is over, its language can be unloaded when idle.
+        self.stop()
+        self.cog.views.pop(self._message, None)
         return self.has_won, self.attempts
 
+    @property
+    def display_word(self) -> str:
+        return f"||{self.word}||" if self.daily else self.word
+
+    async def render_board(self) -> discord.File:
+        self._board, file = await self.cog.render_board(
+            self.solution,
+            self.attempts,
+            max_attempts=self.max_attempts,
+            previous_board=self._board,
+            spoiler=self.daily,  # The colors of the attempts would spoil the word too.
+        )
+        return file
+
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.data["custom_id"] == "WordleGameView_explanation":
             return True
@@ -1,23 +1,37 @@
-﻿from AAA3A_utils import Cog  # isort:skip
+﻿from AAA3A_utils import Cog, Loop, Menu  # isort:skip
 from redbot.core import commands, Config  # isort:skip
 from redbot.core.bot import Red  # isort:skip
 from redbot.core.i18n import Translator, cog_i18n  # isort:skip
 import discord  # isort:skip
 import typing  # isort:skip
 
+import asyncio
 import io
+import itertools
+import random
+import time
 from collections import defaultdict
+from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
-from redbot.core.data_manager import bundled_data_path
+from PIL import Image, ImageFont
+from redbot.core.data_manager import bundled_data_path, cog_data_path
 
-from .view import Lang, WordleGameView
+from .board import BoardRenderer, RenderPool, percentile
+from .dictionary import BinaryDictionary
+from .stats import GuildStats, StatsStore
+from .view import Lang, WordleGameView, normalize
 
 # Credits:
 # General repo credits.
 
 _: Translator = Translator("WordleGame", __file__)
 
+LANG_IDLE_TIMEOUT: int = 60 * 60  # Seconds before the words of a language not played are unloaded.
+STATS_SAVE_INTERVAL: int = 30  # Seconds between two writes of the stats of the finished games.
+LEADERBOARD_PAGE_SIZE: int = 10
+DAY: int = 60 * 60 * 24  # The daily puzzles change at midnight UTC.
+DAILY_MAX_ATTEMPTS: int = 6
+
 
 @cog_i18n(_)
 class Wordlev2(Cog):
@@ -31,33 +45,151 @@ class Wordlev2(Cog):
             identifier=205192943327321000143939875896557571750,
             force_registration=True,
         )
+        self.config.register_global(
+            preloaded_langs=[],
+        )
         self.config.register_member(
             wins=0,
             games=0,
             guess_distribution=[0] * 10,
         )
 
-        self.words: typing.Dict[str, typing.Dict[int, typing.List[str]]] = defaultdict(
-            lambda: defaultdict(list)
-        )
-        self.dictionaries: typing.Dict[str, typing.Dict[int, typing.List[str]]] = defaultdict(
-            lambda: defaultdict(list)
-        )
+        # Languages are loaded the first time they are played, and unloaded when not played for a while.
+        self.words: typing.Dict[str, typing.Dict[int, typing.List[str]]] = {}
+        # Valid guesses, in binary files mapped in memory and searched by dichotomy.
+        self.dictionaries: typing.Dict[str, BinaryDictionary] = {}
+        self.langs_last_use: typing.Dict[str, float] = {}
+        self.langs_locks: typing.Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        # (lang, length) -> the words shuffled once, the word of a day is the one at its index.
+        self.daily_schedules: typing.Dict[typing.Tuple[str, int], typing.List[str]] = {}
+        # (channel ID, member ID) of the running games, whatever the command.
+        self.players: typing.Set[typing.Tuple[int, int]] = set()
         self.font: ImageFont.FreeTypeFont = None
+        self.renderer: BoardRenderer = None
+        self.render_pool: RenderPool = RenderPool()
+        self.stats: StatsStore = None
 
     async def cog_load(self) -> None:
         await super().cog_load()
+        self.font = ImageFont.truetype(str(bundled_data_path(self) / "ClearSans-Bold.ttf"), 80)
+        self.renderer = BoardRenderer(self.font)
+        self.stats = StatsStore(cog_data_path(self) / "stats.sqlite3")
+        if await self.stats.load():  # Stats kept in Config by the previous versions.
+            await self.stats.import_members(await self.config.all_members())
+        self.loops.append(
+            Loop(
+                cog=self,
+                name="Save Stats",
+                function=self.stats.flush,
+                seconds=STATS_SAVE_INTERVAL,
+            )
+        )
+        self.loops.append(
+            Loop(
+                cog=self,
+                name="Unload Idle Languages",
+                function=self.unload_idle_langs,
+                minutes=10,
+            )
+        )
+        self.preload_task: asyncio.Task = asyncio.create_task(self.preload_langs())
+
+    async def cog_unload(self) -> None:
+        self.render_pool.shutdown()
+        if self.stats is not None:
+            await self.stats.flush()
+        for dictionary in self.dictionaries.values():
+            dictionary.close()
+        await super().cog_unload()
+
+    async def red_delete_data_for_user(
+        self,
+        *,
+        requester: typing.Literal["discord_deleted_user", "owner", "user", "user_strict"],
+        user_id: int,
+    ) -> None:
+        await super().red_delete_data_for_user(requester=requester, user_id=user_id)
+        if self.stats is not None:
+            await self.stats.delete_member(user_id)
+
+    async def preload_langs(self) -> None:
+        for lang in await self.config.preloaded_langs():
+            try:
+                await self.load_lang(Lang(lang))
+            except ValueError:
+                pass
+
+    @staticmethod
+    def read_words(path: Path) -> typing.Iterator[str]:
+        if not path.exists():
+            return
+        with path.open(mode="rt", encoding="utf-8") as file:
+            for word in file.read().split("\n"):
+                if word and word != "cancel":
+                    yield word
+
+    def _load_lang(
+        self, lang: Lang
+    ) -> typing.Tuple[typing.Dict[int, typing.List[str]], BinaryDictionary]:
         data_path = bundled_data_path(self)
-        for lang in Lang:
-            for dirname in ("words", "dictionaries"):
-                with (data_path / dirname / f"{lang.value}.txt").open(
-                    mode="rt", encoding="utf-8"
-                ) as file:
-                    for word in file.read().split("\n"):
-                        if word == "cancel":
-                            continue
-                        getattr(self, dirname)[lang.value][len(word)].append(word)
-        self.font = ImageFont.truetype(str(data_path / "ClearSans-Bold.ttf"), 80)
+        words: typing.Dict[int, typing.List[str]] = defaultdict(list)
+        for word in self.read_words(words_path := data_path / "words" / f"{lang.value}.txt"):
+            words[len(word)].append(word)
+        # Some languages have no dictionary, only their words are accepted then.
+        dictionary_path = data_path / "dictionaries" / f"{lang.value}.txt"
+        # The text files are only parsed when the binary file is missing or outdated.
+        dictionary = BinaryDictionary.load(
+            cog_data_path(self) / "dictionaries" / f"{lang.value}.bin",
+            sources=[words_path, dictionary_path],
+            # Indexed by normalized form, like the guesses.
+            get_words=lambda: (
+                normalize(word, lang)
+                for word in itertools.chain(
+                    self.read_words(words_path), self.read_words(dictionary_path)
+                )
+            ),
+        )
+        return dict(words), dictionary
+
+    async def load_lang(self, lang: Lang) -> None:
+        """Load the words and the dictionary of a language, if not already loaded."""
+        self.langs_last_use[lang.value] = time.monotonic()
+        if lang.value in self.dictionaries:
+            return
+        async with self.langs_locks[lang.value]:
+            if lang.value in self.dictionaries:  # Loaded by another game meanwhile.
+                return
+            words, dictionary = await asyncio.to_thread(self._load_lang, lang)
+            self.words[lang.value], self.dictionaries[lang.value] = words, dictionary
+
+    async def unload_idle_langs(self) -> None:
+        preloaded_langs = await self.config.preloaded_langs()
+        played_langs = {
+            game.lang.value for game in self.games.values() if not game.is_finished()
+        }
+        now = time.monotonic()
+        for lang in list(self.dictionaries):
+            if (
+                lang in preloaded_langs
+                or lang in played_langs
+                or now - self.langs_last_use.get(lang, 0) < LANG_IDLE_TIMEOUT
+            ):
+                continue
+            del self.words[lang]
+            self.dictionaries.pop(lang).close()
+            for key in [key for key in self.daily_schedules if key[0] == lang]:
+                del self.daily_schedules[key]
+
+    def get_daily_word(self, lang: Lang, length: int, day: int) -> typing.Optional[str]:
+        """The word of the daily puzzle, the same for everyone. The language must be loaded."""
+        if (schedule := self.daily_schedules.get((lang.value, length))) is None:
+            schedule = sorted(set(self.words[lang.value].get(length, [])))
+            # Seeded by the language and length only, so the schedule doesn't change across restarts.
+            random.Random(f"{lang.value}:{length}").shuffle(schedule)
+            self.daily_schedules[(lang.value, length)] = schedule
+        if not schedule:
+            return None
+        return schedule[day % len(schedule)]
 
     @property
     def games(self) -> typing.Dict[discord.Message, WordleGameView]:
@@ -68,73 +200,43 @@ class Wordlev2(Cog):
         word: str,
         attempts: typing.List[str] = [],
         max_attempts: int = 6,
+        spoiler: bool = False,
     ) -> discord.File:
-        length, size, between, border = len(word), 70, 10, 5
-        image = Image.new(
-            "RGB",
-            (
-                length * size + (length + 1) * between + 2 * border,
-                max_attempts * size + (max_attempts + 1) * between + 2 * border,
-            ),
-            (255, 255, 255),
-        )
-        draw = ImageDraw.Draw(image)
-        for i, attempt in enumerate(attempts):
-            for j in range(length):
-                letter = attempt[j]
-                if letter == word[j]:
-                    color = (106, 170, 100)  # Green
-                elif any(letter == word[k] and attempt[k] != word[k] for k in range(length)):
-                    color = (202, 180, 86)  # Yellow
-                else:
-                    color = (120, 124, 126)  # Grey
-                draw.rectangle(
-                    [
-                        (
-                            border + (j + 1) * between + j * size,
-                            border + (i + 1) * between + i * size,
-                        ),
-                        (
-                            border + (j + 1) * between + (j + 1) * size,
-                            border + (i + 1) * between + (i + 1) * size,
-                        ),
-                    ],
-                    fill=color,
-                )
-                s = self.font.getlength(letter.upper())
-                draw.text(
-                    (
-                        border + (j + 1) * between + j * size + size // 2 - s // 2,
-                        border + (i + 1) * between + i * size - size * 0.36,
-                    ),
-                    letter.upper(),
-                    font=self.font,
-                    fill=(255, 255, 255),
-                )
-        for i in range(max_attempts - len(attempts)):
-            for j in range(length):
-                draw.rectangle(
-                    [
-                        (
-                            border + (j + 1) * between + j * size,
-                            border
-                            + (len(attempts) + i + 1) * between
-                            + (len(attempts) + i) * size,
-                        ),
-                        (
-                            border + (j + 1) * between + (j + 1) * size,
-                            border
-                            + (len(attempts) + i + 1) * between
-                            + (len(attempts) + i + 1) * size,
-                        ),
-                    ],
-                    outline=(211, 214, 218),
-                    width=3,
-                )
-        buffer = io.BytesIO()
-        image.save(buffer, "png")
-        buffer.seek(0)
-        return discord.File(buffer, filename="wordle.png")
+        __, file = await self.render_board(
+            word, attempts, max_attempts=max_attempts, spoiler=spoiler
+        )
+        return file
+
+    async def render_board(
+        self,
+        word: str,
+        attempts: typing.List[str],
+        max_attempts: int = 6,
+        previous_board: typing.Optional[Image.Image] = None,
+        spoiler: bool = False,
+    ) -> typing.Tuple[Image.Image, discord.File]:
+        """Render a board, only drawing the last attempt on `previous_board` if given. The board is returned to be reused for the next attempt."""
+        board, buffer = await self.render_pool.run(
+            self._render_board, word, attempts, max_attempts, previous_board
+        )
+        return board, discord.File(buffer, filename="wordle.png", spoiler=spoiler)
+
+    def _render_board(
+        self,
+        word: str,
+        attempts: typing.List[str],
+        max_attempts: int,
+        previous_board: typing.Optional[Image.Image],
+    ) -> typing.Tuple[Image.Image, io.BytesIO]:
+        if not attempts and previous_board is None:
+            # Every game starts with the same board, encoded only once.
+            return self.renderer.get_empty_board(len(word), max_attempts), io.BytesIO(
+                self.renderer.get_empty_png(len(word), max_attempts)
+            )
+        board = self.renderer.render(
+            word, attempts, max_attempts=max_attempts, previous_board=previous_board
+        )
+        return board, self.renderer.to_png(board)
 
     async def get_kwargs(
         self,
@@ -143,6 +245,8 @@ class Wordlev2(Cog):
         word: str,
         attempts: typing.List[str] = [],
         max_attempts: int = 6,
+        file: typing.Optional[discord.File] = None,
+        spoiler: bool = False,
     ) -> typing.Dict[
         typing.Literal["embed", "file", "allowed_mentions"],
         typing.Union[discord.Embed, discord.File, discord.AllowedMentions],
@@ -160,24 +264,47 @@ class Wordlev2(Cog):
             name=ctx.author.display_name,
             icon_url=ctx.author.display_avatar,
         )
-        has_won, has_lost = word in attempts, len(attempts) == 6
+        solution = normalize(word, lang)
+        has_won, has_lost = solution in attempts, len(attempts) == 6
         if has_won or has_lost:
             embed.add_field(
                 name=_("You won!") if has_won else _("You lost!"),
-                value=_("The word was: **{word}**.").format(word=word),
+                value=_("The word was: **{word}**.").format(
+                    word=f"||{word}||" if spoiler else word
+                ),
             )
         embed.set_footer(
             text=ctx.guild.name,
             icon_url=ctx.guild.icon,
         )
-        file = await self.generate_image(word, attempts, max_attempts=max_attempts)
-        embed.set_image(url="attachment://wordle.png")
+        if file is None:
+            file = await self.generate_image(
+                solution, attempts, max_attempts=max_attempts, spoiler=spoiler
+            )
+        # Images of embeds can't be hidden, so a spoiler board is shown as an attachment instead.
+        if not spoiler:
+            embed.set_image(url="attachment://wordle.png")
         return {
             "embed": embed,
             "file": file,
             "allowed_mentions": discord.AllowedMentions(replied_user=False),
         }
 
+    async def play(
+        self, ctx: commands.Context, view: WordleGameView
+    ) -> typing.Tuple[bool, typing.List[str]]:
+        """Run a game, unless the member already plays in this channel: both games would get the guesses."""
+        key = (ctx.channel.id, ctx.author.id)
+        if key in self.players:
+            raise commands.UserFeedbackCheckFailure(
+                _("You already have a game running in this channel.")
+            )
+        self.players.add(key)
+        try:
+            return await view.start(ctx)
+        finally:
+            self.players.discard(key)
+
     @commands.max_concurrency(1, commands.BucketType.member)
     @commands.guild_only()
     @commands.bot_has_permissions(embed_links=True, attach_files=True)
@@ -194,18 +321,264 @@ class Wordlev2(Cog):
         You can find the rules of the game by clicking on the button after starting the game.
         Available languages: `en`, `fr`, `de`, `es`, `it`, `pt`, `nl`, `cs`, `el`, `id`, `ie`, `ph`, `pl`, `ua`, `ru`, `sv` and `tr`.
         """
-        has_won, attempts = await WordleGameView(
-            self,
-            lang=lang,
-            length=length,
-            max_attempts=max_attempts,
-        ).start(ctx)
-        data = await self.config.member(ctx.author).all()
-        data["games"] += 1
-        if has_won:
-            data["wins"] += 1
-            data["guess_distribution"][len(attempts) - 1] += 1
-        await self.config.member(ctx.author).set(data)
+        has_won, attempts = await self.play(
+            ctx,
+            WordleGameView(
+                self,
+                lang=lang,
+                length=length,
+                max_attempts=max_attempts,
+            ),
+        )
+        # Written to the database with the other games of the last seconds.
+        await self.stats.record_game(
+            ctx.guild.id, ctx.author.id, has_won=has_won, attempts=len(attempts)
+        )
+
+    @commands.max_concurrency(1, commands.BucketType.member)
+    @commands.guild_only()
+    @commands.bot_has_permissions(embed_links=True, attach_files=True)
+    @commands.hybrid_command()
+    async def wordledaily(
+        self,
+        ctx: commands.Context,
+        lang: typing.Optional[Lang] = Lang.ENGLISH,
+        length: typing.Optional[commands.Range[int, 4, 11]] = 5,
+    ) -> None:
+        """Play the daily Wordle puzzle.
+
+        The word is the same for everyone, and changes every day at midnight UTC. You can only play it once a day.
+        """
+        day = int(time.time() // DAY)
+        if ctx.author.id in await self.stats.get_daily(ctx.guild.id, day, lang.value, length):
+            raise commands.UserFeedbackCheckFailure(
+                _("You have already played today's puzzle. The next one is {next_puzzle}.").format(
+                    next_puzzle=f"<t:{(day + 1) * DAY}:R>"
+                )
+            )
+        await self.load_lang(lang)
+        if (word := self.get_daily_word(lang, length, day)) is None:
+            raise commands.UserFeedbackCheckFailure(
+                _("There are no words in this language with {length} letters.").format(
+                    length=length
+                )
+            )
+        has_won, attempts = await self.play(
+            ctx,
+            WordleGameView(
+                self,
+                lang=lang,
+                length=length,
+                max_attempts=DAILY_MAX_ATTEMPTS,
+                word=word,
+                daily=True,
+            ),
+        )
+        await self.stats.record_game(
+            ctx.guild.id, ctx.author.id, has_won=has_won, attempts=len(attempts)
+        )
+        await self.stats.record_daily(
+            ctx.guild.id,
+            day,
+            lang.value,
+            length,
+            ctx.author.id,
+            has_won=has_won,
+            attempts=len(attempts),
+        )
+
+    @commands.guild_only()
+    @commands.bot_has_permissions(embed_links=True)
+    @commands.command()
+    async def wordledailyresults(
+        self,
+        ctx: commands.Context,
+        lang: typing.Optional[Lang] = Lang.ENGLISH,
+        length: typing.Optional[commands.Range[int, 4, 11]] = 5,
+    ) -> None:
+        """Show the results of today's daily puzzle in this guild, without spoiling the word."""
+        day = int(time.time() // DAY)
+        results = await self.stats.get_daily(ctx.guild.id, day, lang.value, length)
+        if not results:
+            raise commands.UserFeedbackCheckFailure(
+                _("No one has played today's puzzle in this guild yet.")
+            )
+        wins = [attempts for has_won, attempts in results.values() if has_won]
+        embed: discord.Embed = discord.Embed(
+            title=_("{flag} Daily Wordle Puzzle - {length} letters").format(
+                flag=f":flag_{'gb' if lang is Lang.ENGLISH else lang.value}:",
+                length=length,
+            ),
+            description=_(
+                ">>> **Players**: {players}\n**Wins**: {wins}\n**Win rate:** {win_rate:.2%}\n**Next puzzle**: {next_puzzle}"
+            ).format(
+                players=len(results),
+                wins=len(wins),
+                win_rate=len(wins) / len(results),
+                next_puzzle=f"<t:{(day + 1) * DAY}:R>",
+            ),
+            color=await ctx.embed_color(),
+        )
+        if wins:
+            embed.add_field(
+                name=_("Guess distribution:"),
+                value="\n".join(
+                    _("- **{count}** player{s} with {i} attempts").format(
+                        count=count, i=i, s="s" if count > 1 else ""
+                    )
+                    for i in range(1, DAILY_MAX_ATTEMPTS + 1)
+                    if (count := wins.count(i))
+                ),
+            )
+        embed.set_footer(
+            text=ctx.guild.name,
+            icon_url=ctx.guild.icon,
+        )
+        await ctx.send(embed=embed)
+
+    @commands.is_owner()
+    @commands.command()
+    async def wordlepreload(self, ctx: commands.Context, *langs: Lang) -> None:
+        """Set the languages loaded at startup and never unloaded.
+
+        The other languages are loaded the first time they are played, and unloaded after an hour without game.
+        Don't specify any language to reset the list.
+        """
+        await self.config.preloaded_langs.set([lang.value for lang in langs])
+        for lang in langs:
+            await self.load_lang(lang)
+        if langs:
+            await ctx.send(
+                _("Preloaded languages: {langs}.").format(
+                    langs=", ".join(f"`{lang.value}`" for lang in langs)
+                )
+            )
+        else:
+            await ctx.send(_("No language will be preloaded."))
+
+    @commands.is_owner()
+    @commands.bot_has_permissions(embed_links=True)
+    @commands.command(hidden=True)
+    async def wordlerenderstats(self, ctx: commands.Context) -> None:
+        """Show the metrics of the boards rendering pool."""
+        pool = self.render_pool
+
+        def format_times(times: typing.Iterable[float]) -> str:
+            return " / ".join(
+                f"{value * 1000:.1f} ms" if (value := percentile(times, percent)) is not None else "-"
+                for percent in (50, 95, 99)
+            )
+
+        embed: discord.Embed = discord.Embed(
+            title=_("Wordle Render Pool"),
+            color=await ctx.embed_color(),
+        )
+        embed.add_field(
+            name=_("Queue"),
+            value=_(
+                "Workers: {workers}\nRunning or queued: {in_flight}\nWaiting for a slot: {waiting}\nMax depth: {max_depth}"
+            ).format(
+                workers=pool.workers,
+                in_flight=pool.in_flight,
+                waiting=pool.waiting,
+                max_depth=pool.max_depth,
+            ),
+        )
+        embed.add_field(
+            name=_("Renders"),
+            value=_(
+                "Count: {count}\nRender time (p50 / p95 / p99): {render_times}\nWait time (p50 / p95 / p99): {wait_times}"
+            ).format(
+                count=pool.renders,
+                render_times=format_times(pool.render_times),
+                wait_times=format_times(pool.wait_times),
+            ),
+            inline=False,
+        )
+        await ctx.send(embed=embed)
+
+    @commands.guild_only()
+    @commands.bot_has_permissions(embed_links=True)
+    @commands.command(aliases=["wordlelb"])
+    async def wordleleaderboard(
+        self,
+        ctx: commands.Context,
+        sort_by: typing.Literal["wins", "winrate", "games"] = "wins",
+    ) -> None:
+        """Show the leaderboard of the Wordle game in this guild."""
+        guild_stats = await self.stats.get_guild(ctx.guild.id)
+        if not (leaderboard := guild_stats.leaderboard(sort_by)):
+            raise commands.UserFeedbackCheckFailure(_("No one has played in this guild yet."))
+        lines = [
+            _(
+                "{rank}. {member} - **{wins}** wins / {games} games ({win_rate:.2%})"
+            ).format(
+                rank=rank,
+                member=member.mention
+                if (member := ctx.guild.get_member(member_id)) is not None
+                else f"`{member_id}`",
+                wins=stats.wins,
+                games=stats.games,
+                win_rate=stats.win_rate,
+            )
+            for rank, (member_id, stats) in enumerate(leaderboard, start=1)
+        ]
+        embeds = []
+        for i in range(0, len(lines), LEADERBOARD_PAGE_SIZE):
+            embed: discord.Embed = discord.Embed(
+                title=_("Wordle Game Leaderboard"),
+                description="\n".join(lines[i : i + LEADERBOARD_PAGE_SIZE]),
+                color=await ctx.embed_color(),
+            )
+            embed.set_footer(
+                text=_("Page {page}/{pages} - {count} players").format(
+                    page=i // LEADERBOARD_PAGE_SIZE + 1,
+                    pages=(len(lines) - 1) // LEADERBOARD_PAGE_SIZE + 1,
+                    count=len(lines),
+                ),
+                icon_url=ctx.guild.icon,
+            )
+            embeds.append(embed)
+        await Menu(pages=embeds).start(ctx)
+
+    @commands.guild_only()
+    @commands.bot_has_permissions(embed_links=True)
+    @commands.command()
+    async def wordlepercentile(
+        self,
+        ctx: commands.Context,
+        *,
+        member: discord.Member = commands.Author,
+    ) -> None:
+        """Show how a member ranks against the other players of this guild."""
+        guild_stats = await self.stats.get_guild(ctx.guild.id)
+        if (stats := guild_stats.members.get(member.id)) is None or not stats.games:
+            raise commands.UserFeedbackCheckFailure(_("This member hasn't played yet."))
+        embed: discord.Embed = discord.Embed(
+            title=_("Wordle Game Percentiles"),
+            description=_("Share of the other players of this guild with a lower value."),
+            color=await ctx.embed_color(),
+        )
+        embed.set_author(name=member.display_name, icon_url=member.display_avatar)
+        for key, name in (
+            ("wins", _("Wins")),
+            ("winrate", _("Win rate")),
+            ("games", _("Games played")),
+        ):
+            embed.add_field(
+                name=name,
+                value=_("{percentile:.0%} (value: {value})").format(
+                    percentile=guild_stats.percentile(key, member.id),
+                    value=(
+                        f"{GuildStats.RANKINGS[key](stats):.2%}"
+                        if key == "winrate"
+                        else GuildStats.RANKINGS[key](stats)
+                    ),
+                ),
+            )
+        if (average_guesses := stats.average_guesses) is not None:
+            embed.add_field(name=_("Average guesses"), value=f"{average_guesses:.2f}")
+        await ctx.send(embed=embed)
 
     @commands.guild_only()
     @commands.bot_has_permissions(embed_links=True)
@@ -217,7 +590,7 @@ class Wordlev2(Cog):
         member: discord.Member = commands.Author,
     ) -> None:
         """Show the stats for the Wordle game."""
-        data = await self.config.member(member).all()
+        data = (await self.stats.get_member(ctx.guild.id, member.id)).to_dict()
         embed = discord.Embed(
             title=_("Wordle Game Stats"),
             description=_(